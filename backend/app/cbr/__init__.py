@@ -1,12 +1,14 @@
 # CBR Package
-from .cbr_engine import CBREngine, get_cbr_engine
+from .cbr_engine import CBREngine, create_cbr_engine
 from .weighted_euclidean import WeightedEuclideanDistance
 from .evaluator import ModelEvaluator, get_evaluator
+from .batcher import SimilarityBatcher
 
 __all__ = [
     "CBREngine", 
-    "get_cbr_engine",
+    "create_cbr_engine",
     "WeightedEuclideanDistance", 
     "ModelEvaluator",
-    "get_evaluator"
+    "get_evaluator",
+    "SimilarityBatcher"
 ]
@@ -0,0 +1,245 @@
+"""
+Kernel numerik untuk Weighted Euclidean Distance
+Dikompilasi dengan Numba jika tersedia, fallback ke NumPy jika tidak.
+Semua kernel bekerja pada float32 (fitur sudah dinormalisasi 0-1),
+kecuali weighted_sqeuclid_q16 yang memakai fitur terkuantisasi int16.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - numba opsional
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+
+    @njit('f4[:, :](f4[:, :], f4[:, :], f4[:])', cache=True, parallel=True, fastmath=True)
+    def weighted_euclidean(train: np.ndarray, test: np.ndarray, w: np.ndarray) -> np.ndarray:
+        """
+        Hitung matriks Weighted Euclidean Distance antara test dan train.
+
+        Args:
+            train: Matriks fitur training (n_train, n_features), float32
+            test: Matriks fitur testing (n_test, n_features), float32
+            w: Vektor bobot ternormalisasi (n_features,), float32
+
+        Returns:
+            Matriks distance (n_test, n_train)
+        """
+        n_test = test.shape[0]
+        n_train = train.shape[0]
+        n_features = train.shape[1]
+        out = np.empty((n_test, n_train), dtype=np.float32)
+
+        for i in prange(n_test):
+            for j in range(n_train):
+                acc = np.float32(0.0)
+                for f in range(n_features):
+                    diff = test[i, f] - train[j, f]
+                    acc += w[f] * diff * diff
+                out[i, j] = np.sqrt(acc)
+
+        return out
+
+    @njit('f4[::1](f4[:, ::1], f4[::1], f4[::1])', cache=True, parallel=True, fastmath=True)
+    def weighted_sqeuclid_d7(X: np.ndarray, q: np.ndarray, w: np.ndarray) -> np.ndarray:
+        """
+        Versi weighted_sqeuclid khusus 7 fitur (jumlah atribut default).
+        Loop fitur di-unroll sehingga query dan bobot tetap di register.
+
+        Args:
+            X: Matriks fitur case (n_cases, 7), float32 C-contiguous
+            q: Vektor fitur query (7,), float32
+            w: Vektor bobot ternormalisasi (7,), float32
+
+        Returns:
+            Vektor squared distance (n_cases,)
+        """
+        q0, q1, q2, q3, q4, q5, q6 = q[0], q[1], q[2], q[3], q[4], q[5], q[6]
+        w0, w1, w2, w3, w4, w5, w6 = w[0], w[1], w[2], w[3], w[4], w[5], w[6]
+        n_cases = X.shape[0]
+        out = np.empty(n_cases, dtype=np.float32)
+
+        for i in prange(n_cases):
+            d0 = X[i, 0] - q0
+            d1 = X[i, 1] - q1
+            d2 = X[i, 2] - q2
+            d3 = X[i, 3] - q3
+            d4 = X[i, 4] - q4
+            d5 = X[i, 5] - q5
+            d6 = X[i, 6] - q6
+            out[i] = (
+                w0 * d0 * d0 + w1 * d1 * d1 + w2 * d2 * d2 + w3 * d3 * d3
+                + w4 * d4 * d4 + w5 * d5 * d5 + w6 * d6 * d6
+            )
+
+        return out
+
+    @njit('f4[::1](f4[:, ::1], f4[::1], f4[::1])', cache=True, parallel=True, fastmath=True)
+    def weighted_sqeuclid(X: np.ndarray, q: np.ndarray, w: np.ndarray) -> np.ndarray:
+        """
+        Hitung kuadrat Weighted Euclidean Distance satu query terhadap semua case.
+        Matriks 7 fitur diteruskan ke weighted_sqeuclid_d7.
+
+        Args:
+            X: Matriks fitur case (n_cases, n_features), float32 C-contiguous
+            q: Vektor fitur query (n_features,), float32
+            w: Vektor bobot ternormalisasi (n_features,), float32
+
+        Returns:
+            Vektor squared distance (n_cases,)
+        """
+        if X.shape[1] == 7:
+            return weighted_sqeuclid_d7(X, q, w)
+
+        n_cases = X.shape[0]
+        n_features = X.shape[1]
+        out = np.empty(n_cases, dtype=np.float32)
+
+        for i in prange(n_cases):
+            acc = np.float32(0.0)
+            for j in range(n_features):
+                diff = X[i, j] - q[j]
+                acc += w[j] * diff * diff
+            out[i] = acc
+
+        return out
+
+    @njit('f4[:, ::1](f4[:, ::1], f4[:, ::1], f4[:, ::1])', cache=True, parallel=True, fastmath=True)
+    def weighted_sqeuclid_batch(X: np.ndarray, Q: np.ndarray, W: np.ndarray) -> np.ndarray:
+        """
+        Hitung kuadrat Weighted Euclidean Distance banyak query sekaligus.
+        Matriks case dibaca sekali untuk seluruh batch query.
+
+        Args:
+            X: Matriks fitur case (n_cases, n_features), float32 C-contiguous
+            Q: Matriks fitur query (n_queries, n_features), float32
+            W: Matriks bobot per query (n_queries, n_features), float32
+
+        Returns:
+            Matriks squared distance (n_queries, n_cases)
+        """
+        n_cases = X.shape[0]
+        n_features = X.shape[1]
+        n_queries = Q.shape[0]
+        out = np.empty((n_queries, n_cases), dtype=np.float32)
+
+        for i in prange(n_cases):
+            for b in range(n_queries):
+                acc = np.float32(0.0)
+                for j in range(n_features):
+                    diff = X[i, j] - Q[b, j]
+                    acc += W[b, j] * diff * diff
+                out[b, i] = acc
+
+        return out
+
+    @njit('f8[:, ::1](i2[:, ::1], i2[:, ::1], f8[::1])', cache=True, parallel=True)
+    def weighted_sqeuclid_q16(X: np.ndarray, Q: np.ndarray, w: np.ndarray) -> np.ndarray:
+        """
+        Kuadrat Weighted Euclidean Distance pada fitur terkuantisasi int16.
+        Selisih dihitung dalam integer (exact), hanya bobot yang float.
+
+        Args:
+            X: Matriks fitur case terkuantisasi (n_cases, n_features), int16
+            Q: Matriks fitur query terkuantisasi (n_queries, n_features), int16
+            w: Vektor bobot (n_features,), float64
+
+        Returns:
+            Matriks squared distance dalam satuan kuantisasi (n_queries, n_cases)
+        """
+        n_cases = X.shape[0]
+        n_features = X.shape[1]
+        n_queries = Q.shape[0]
+        out = np.empty((n_queries, n_cases), dtype=np.float64)
+
+        for b in prange(n_queries):
+            for i in range(n_cases):
+                acc = 0.0
+                for j in range(n_features):
+                    diff = np.int64(X[i, j]) - np.int64(Q[b, j])
+                    acc += w[j] * (diff * diff)
+                out[b, i] = acc
+
+        return out
+
+else:
+
+    def weighted_euclidean(train: np.ndarray, test: np.ndarray, w: np.ndarray) -> np.ndarray:
+        """
+        Hitung matriks Weighted Euclidean Distance antara test dan train.
+
+        Args:
+            train: Matriks fitur training (n_train, n_features), float32
+            test: Matriks fitur testing (n_test, n_features), float32
+            w: Vektor bobot ternormalisasi (n_features,), float32
+
+        Returns:
+            Matriks distance (n_test, n_train)
+        """
+        diff = test[:, None, :] - train[None, :, :]
+        return np.sqrt((diff * diff * w).sum(axis=-1))
+
+    def weighted_sqeuclid_d7(X: np.ndarray, q: np.ndarray, w: np.ndarray) -> np.ndarray:
+        """
+        Versi weighted_sqeuclid khusus 7 fitur (tanpa Numba sama dengan versi umum).
+
+        Args:
+            X: Matriks fitur case (n_cases, 7), float32 C-contiguous
+            q: Vektor fitur query (7,), float32
+            w: Vektor bobot ternormalisasi (7,), float32
+
+        Returns:
+            Vektor squared distance (n_cases,)
+        """
+        return weighted_sqeuclid(X, q, w)
+
+    def weighted_sqeuclid(X: np.ndarray, q: np.ndarray, w: np.ndarray) -> np.ndarray:
+        """
+        Hitung kuadrat Weighted Euclidean Distance satu query terhadap semua case.
+
+        Args:
+            X: Matriks fitur case (n_cases, n_features), float32 C-contiguous
+            q: Vektor fitur query (n_features,), float32
+            w: Vektor bobot ternormalisasi (n_features,), float32
+
+        Returns:
+            Vektor squared distance (n_cases,)
+        """
+        diff = X - q
+        return (diff * diff) @ w
+
+    def weighted_sqeuclid_batch(X: np.ndarray, Q: np.ndarray, W: np.ndarray) -> np.ndarray:
+        """
+        Hitung kuadrat Weighted Euclidean Distance banyak query sekaligus.
+
+        Args:
+            X: Matriks fitur case (n_cases, n_features), float32 C-contiguous
+            Q: Matriks fitur query (n_queries, n_features), float32
+            W: Matriks bobot per query (n_queries, n_features), float32
+
+        Returns:
+            Matriks squared distance (n_queries, n_cases)
+        """
+        return np.stack([weighted_sqeuclid(X, q, w) for q, w in zip(Q, W)])
+
+    def weighted_sqeuclid_q16(X: np.ndarray, Q: np.ndarray, w: np.ndarray) -> np.ndarray:
+        """
+        Kuadrat Weighted Euclidean Distance pada fitur terkuantisasi int16.
+
+        Args:
+            X: Matriks fitur case terkuantisasi (n_cases, n_features), int16
+            Q: Matriks fitur query terkuantisasi (n_queries, n_features), int16
+            w: Vektor bobot (n_features,), float64
+
+        Returns:
+            Matriks squared distance dalam satuan kuantisasi (n_queries, n_cases)
+        """
+        out = np.zeros((Q.shape[0], X.shape[0]))
+        for j in range(X.shape[1]):
+            diff = X[None, :, j].astype(np.int64) - Q[:, j, None]
+            out += w[j] * (diff * diff)
+        return out
@@ -0,0 +1,148 @@
+"""
+Micro-batching similarity antar request
+Query dari request yang datang bersamaan digabung menjadi satu batch
+sehingga matriks fitur case dibaca sekali untuk seluruh batch.
+"""
+
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+import anyio
+import numpy as np
+
+from ._kernels import weighted_sqeuclid_batch
+from .weighted_euclidean import squared_to_similarity
+
+logger = logging.getLogger(__name__)
+
+# (query_vector, weight_vector, constant, future)
+_PendingQuery = Tuple[np.ndarray, np.ndarray, float, asyncio.Future]
+
+
+class SimilarityBatcher:
+    """
+    Dispatcher background yang menghitung similarity banyak query sekaligus.
+    
+    Batch diambil dari semua query yang sudah menunggu di antrian (ditambah
+    jendela tunggu opsional), lalu dihitung dengan satu pemanggilan kernel
+    weighted_sqeuclid_batch di worker thread.
+    """
+    
+    def __init__(self, engine, max_batch: int = 64, window_ms: float = 0.0):
+        """
+        Inisialisasi batcher.
+        
+        Args:
+            engine: CBREngine yang matriks fiturnya dipakai
+            max_batch: Jumlah query maksimum per batch
+            window_ms: Waktu tunggu tambahan untuk mengumpulkan batch (ms)
+        """
+        self.engine = engine
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        """Menjalankan task dispatcher di event loop aktif."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Menghentikan dispatcher dan membatalkan query yang masih menunggu."""
+        if self._task is None:
+            return
+        
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        
+        while not self._queue.empty():
+            *_, future = self._queue.get_nowait()
+            future.cancel()
+    
+    async def submit(
+        self,
+        query_vector: np.ndarray,
+        weight_vector: np.ndarray,
+        constant: float
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Mengantrikan satu query dan menunggu hasil batch-nya.
+        
+        Args:
+            query_vector: Vektor fitur query (dari engine.similarity_inputs)
+            weight_vector: Vektor bobot query
+            constant: Kontribusi atribut tanpa kolom
+        
+        Returns:
+            Tuple (array similarity (n_cases,), versi case base engine
+            saat batch dihitung)
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query_vector, weight_vector, constant, future))
+        return await future
+    
+    async def _collect(self) -> List[_PendingQuery]:
+        """
+        Mengambil satu batch query dari antrian.
+        
+        Returns:
+            List query yang akan dihitung bersama
+        """
+        batch = [await self._queue.get()]
+        
+        if self.window > 0:
+            deadline = asyncio.get_running_loop().time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        
+        while len(batch) < self.max_batch and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        
+        return batch
+    
+    async def _run(self) -> None:
+        """
+        Loop dispatcher: kumpulkan batch, hitung, bagikan hasil per query.
+        
+        Seluruh isi batch dijalankan di dalam try sehingga error pada satu batch
+        hanya diteruskan ke future-nya dan dispatcher tetap berjalan.
+        """
+        while True:
+            batch = await self._collect()
+            
+            try:
+                # Versi dan matriks dari snapshot yang sama
+                state = self.engine.state
+                version = state.version
+                case_matrix = np.ascontiguousarray(state.features, dtype=np.float32)
+                query_matrix = np.stack([item[0] for item in batch])
+                weight_matrix = np.stack([item[1] for item in batch])
+                
+                squared = await anyio.to_thread.run_sync(
+                    weighted_sqeuclid_batch, case_matrix, query_matrix, weight_matrix
+                )
+                
+                for row, (_, _, constant, future) in zip(squared, batch):
+                    if not future.done():
+                        future.set_result((squared_to_similarity(row, constant), version))
+            except asyncio.CancelledError:
+                for *_, future in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"Similarity batch gagal: {e}")
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
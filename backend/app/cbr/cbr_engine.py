@@ -5,9 +5,11 @@ Implementasi 4 fase: Retrieve, Reuse, Revise, Retain
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple, Any
+from types import MappingProxyType
 from datetime import datetime
 import logging
+import threading
 
 from .weighted_euclidean import WeightedEuclideanDistance
 from ..utils.data_loader import DataLoader
@@ -17,12 +19,42 @@ from ..config import settings
 logger = logging.getLogger(__name__)
 
 
+class CaseBaseState(NamedTuple):
+    """
+    Snapshot case base beserta struct-of-arrays dan ringkasannya.
+    
+    Snapshot tidak pernah diubah setelah dibuat; engine menyusun snapshot baru
+    lalu mempublikasikannya dengan satu assignment, sehingga request yang
+    sedang berjalan selalu membaca case_base, features, dan ids dari versi
+    yang sama.
+    """
+    case_base: Optional[pd.DataFrame]
+    case_base_normalized: Optional[pd.DataFrame]
+    preprocessor: DataPreprocessor
+    features: np.ndarray
+    feature_names: List[str]
+    ids: np.ndarray
+    id_index: Dict[int, int]  # Id_hp -> posisi baris
+    version: int  # Naik setiap kali case base berubah (load/retain/hapus)
+    stats: Dict
+    brands: List[str]
+    brand_counts: Dict[str, int]
+    price_range: Dict[str, int]
+
+
 class CBREngine:
     """
     CBR Engine untuk rekomendasi HP dengan Weighted Euclidean Distance.
     Cycle: Retrieve -> Reuse -> Revise -> Retain
     """
     
+    # Kolom fitur ternormalisasi yang dipakai untuk similarity
+    FEATURE_COLUMNS = [
+        'Harga_norm', 'Ram_norm', 'Memori_internal_norm',
+        'Ukuran_layar_norm', 'Kapasitas_baterai_norm',
+        'Resolusi_kamera_num_norm', 'Rating_pengguna_norm'
+    ]
+    
     def __init__(self, weights: Dict[str, float] = None):
         """
         Inisialisasi CBR Engine.
@@ -30,21 +62,74 @@ class CBREngine:
         Args:
             weights: Bobot atribut dalam persentase (optional)
         """
-        self.case_base: Optional[pd.DataFrame] = None
-        self.case_base_normalized: Optional[pd.DataFrame] = None
         self.data_loader: Optional[DataLoader] = None
-        self.preprocessor = DataPreprocessor()
+        
+        # Snapshot case base yang sedang dipakai (diganti utuh, tidak dimutasi)
+        self._state = CaseBaseState(
+            case_base=None,
+            case_base_normalized=None,
+            preprocessor=DataPreprocessor(),
+            features=np.empty((0, 0), dtype=np.float32),
+            feature_names=[],
+            ids=np.empty(0, dtype=np.int64),
+            id_index={},
+            version=0,
+            stats={},
+            brands=[],
+            brand_counts={},
+            price_range={}
+        )
+        # Serialisasi penulis (load/retain/hapus); pembaca tidak perlu lock
+        self._write_lock = threading.RLock()
         
         # Set weights
         self.weights = weights or settings.DEFAULT_WEIGHTS.copy()
         self.distance_calculator = WeightedEuclideanDistance(self.weights)
+        self._weights_view = MappingProxyType(self.weights)
         
         self.is_initialized = False
         logger.info("CBR Engine initialized")
+    
+    @property
+    def state(self) -> CaseBaseState:
+        """Snapshot case base saat ini (baca sekali per operasi)."""
+        return self._state
+    
+    # Akses read-only ke snapshot aktif (nama atribut lama tetap berlaku)
+    @property
+    def case_base(self) -> Optional[pd.DataFrame]:
+        return self._state.case_base
+    
+    @property
+    def case_base_normalized(self) -> Optional[pd.DataFrame]:
+        return self._state.case_base_normalized
+    
+    @property
+    def preprocessor(self) -> DataPreprocessor:
+        return self._state.preprocessor
+    
+    @property
+    def features(self) -> np.ndarray:
+        return self._state.features
+    
+    @property
+    def feature_names(self) -> List[str]:
+        return self._state.feature_names
+    
+    @property
+    def ids(self) -> np.ndarray:
+        return self._state.ids
+    
+    @property
+    def version(self) -> int:
+        return self._state.version
         
     def load_case_base(self, file_path: str = None) -> None:
         """
-        Memuat case base dari file Excel.
+        Memuat case base dari SQLite (disalin dari file Excel saat pertama kali).
+        
+        Case base baru disusun terpisah lalu dipublikasikan sekaligus, sehingga
+        request yang berjalan bersamaan tetap memakai snapshot lama yang utuh.
         
         Args:
             file_path: Path ke file dataset (optional, default dari settings)
@@ -53,24 +138,267 @@ class CBREngine:
         
         logger.info(f"Loading case base from: {file_path}")
         
-        try:
-            # Load data
-            self.data_loader = DataLoader(file_path)
-            self.case_base = self.data_loader.load(validate=True)
+        with self._write_lock:
+            try:
+                # Load data
+                data_loader = DataLoader(file_path, db_path=settings.DATABASE_PATH)
+                case_base = data_loader.load(validate=True)
+                
+                # Preprocess and normalize (preprocessor baru, milik snapshot ini)
+                preprocessor = DataPreprocessor()
+                case_base_normalized = preprocessor.fit_transform(case_base)
+                state = self._build_state(
+                    data_loader, case_base, case_base_normalized, preprocessor
+                )
+                
+                self.data_loader = data_loader
+                self._state = state
+                
+                self.is_initialized = True
+                logger.info(f"Case base loaded: {len(case_base)} cases")
+                
+            except Exception as e:
+                logger.error(f"Failed to load case base: {e}")
+                # Initialize with empty DataFrame to prevent None errors
+                self._state = self._state._replace(
+                    case_base=pd.DataFrame(),
+                    case_base_normalized=pd.DataFrame()
+                )
+                self.is_initialized = False
+                raise
+    
+    def _build_state(
+        self,
+        data_loader: DataLoader,
+        case_base: pd.DataFrame,
+        case_base_normalized: pd.DataFrame,
+        preprocessor: DataPreprocessor
+    ) -> CaseBaseState:
+        """
+        Bangun snapshot baru: matriks fitur contiguous float32 (N, n_features)
+        dan array ID untuk fase RETRIEVE, plus ringkasan case base.
+        
+        Args:
+            data_loader: DataLoader yang df-nya adalah case_base
+            case_base: Case base asli
+            case_base_normalized: Case base ternormalisasi
+            preprocessor: Preprocessor yang di-fit pada case_base
             
-            # Preprocess and normalize
-            self.case_base_normalized = self.preprocessor.fit_transform(self.case_base)
+        Returns:
+            CaseBaseState dengan versi berikutnya
+        """
+        columns = [c for c in self.FEATURE_COLUMNS if c in case_base_normalized.columns]
+        
+        features = np.ascontiguousarray(
+            case_base_normalized[columns].fillna(0.5).to_numpy(dtype=np.float32)
+        )
+        ids = case_base['Id_hp'].to_numpy()
+        
+        return CaseBaseState(
+            case_base=case_base,
+            case_base_normalized=case_base_normalized,
+            preprocessor=preprocessor,
+            features=features,
+            feature_names=[c.replace('_norm', '') for c in columns],
+            ids=ids,
+            id_index={int(phone_id): i for i, phone_id in enumerate(ids)},
+            version=self._state.version + 1,
+            **self._build_summaries(data_loader, case_base)
+        )
+    
+    @staticmethod
+    def _build_summaries(data_loader: DataLoader, case_base: pd.DataFrame) -> Dict:
+        """
+        Hitung statistik, daftar brand, dan range harga dari case base.
+        Hasilnya disimpan agar endpoint read-only tidak memindai ulang DataFrame.
+        
+        Args:
+            data_loader: DataLoader yang df-nya adalah case_base
+            case_base: Case base asli
             
-            self.is_initialized = True
-            logger.info(f"Case base loaded: {len(self.case_base)} cases")
+        Returns:
+            Dictionary field ringkasan untuk CaseBaseState
+        """
+        brand_counts = case_base['Brand'].value_counts()
+        brand_counts = brand_counts[brand_counts > 0]  # Buang kategori tanpa HP
+        
+        prices = case_base['Harga']
+        return {
+            "stats": data_loader.get_statistics(),
+            "brands": sorted(brand_counts.index.tolist()),
+            "brand_counts": brand_counts.to_dict(),
+            "price_range": {
+                "min_price": int(prices.min()),
+                "max_price": int(prices.max()),
+                "avg_price": int(prices.mean())
+            }
+        }
+    
+    def _append_state(self, new_case: Dict) -> CaseBaseState:
+        """
+        Bangun snapshot baru berisi snapshot aktif ditambah satu kasus.
+        
+        Tabel tidak dibaca ulang. Selama nilai kasus baru berada di dalam
+        min/max hasil fit dan brand/OS-nya sudah dikenal, fit tidak berubah:
+        baris baru cukup di-transform dengan preprocessor aktif lalu
+        ditambahkan ke matriks fitur, ids, dan id_index. Di luar itu semua
+        kolom *_norm ikut bergeser, sehingga preprocessor di-fit ulang dari
+        case base di memori (hasilnya sama dengan load ulang).
+        
+        Snapshot tidak boleh dimutasi (bisa sedang dibaca request lain) dan
+        pandas tidak punya append in-place, jadi DataFrame dan array tetap
+        disalin sekali (memcpy) ke snapshot baru.
+        
+        Args:
+            new_case: Data kasus yang sudah disimpan (termasuk Id_hp)
             
-        except Exception as e:
-            logger.error(f"Failed to load case base: {e}")
-            # Initialize with empty DataFrame to prevent None errors
-            self.case_base = pd.DataFrame()
-            self.case_base_normalized = pd.DataFrame()
-            self.is_initialized = False
-            raise
+        Returns:
+            CaseBaseState dengan versi berikutnya
+        """
+        state = self._state
+        row = self._case_row(new_case, state.case_base)
+        
+        # Kategori baru (mis. brand baru) -> dtype Categorical diperluas
+        base = state.case_base
+        widened = {
+            col: pd.CategoricalDtype(sorted(set(dtype.categories) | set(row[col].dropna())))
+            for col, dtype in base.dtypes.items()
+            if isinstance(dtype, pd.CategoricalDtype) and not row[col].dropna().isin(dtype.categories).all()
+        }
+        if widened:
+            base = base.astype(widened)
+        row = row.astype({
+            col: dtype for col, dtype in base.dtypes.items()
+            if isinstance(dtype, pd.CategoricalDtype)
+        })
+        case_base = pd.concat([base, row], ignore_index=True)
+        
+        # Ringkasan (get_statistics) dihitung dari df loader
+        self.data_loader.df = case_base
+        
+        preprocessor = state.preprocessor
+        if widened or not self._within_fit(preprocessor, row):
+            preprocessor = DataPreprocessor()
+            case_base_normalized = preprocessor.fit_transform(case_base)
+            return self._build_state(
+                self.data_loader, case_base, case_base_normalized, preprocessor
+            )
+        
+        row_normalized = preprocessor.transform(row)
+        case_base_normalized = pd.concat(
+            [state.case_base_normalized, row_normalized], ignore_index=True
+        )
+        
+        columns = [f'{name}_norm' for name in state.feature_names]
+        row_features = row_normalized[columns].fillna(0.5).to_numpy(dtype=np.float32)
+        ids = np.append(state.ids, row['Id_hp'].to_numpy(dtype=state.ids.dtype))
+        
+        return state._replace(
+            case_base=case_base,
+            case_base_normalized=case_base_normalized,
+            features=np.ascontiguousarray(np.concatenate([state.features, row_features])),
+            ids=ids,
+            id_index={**state.id_index, int(ids[-1]): len(ids) - 1},
+            version=state.version + 1,
+            **self._build_summaries(self.data_loader, case_base)
+        )
+    
+    @staticmethod
+    def _case_row(new_case: Dict, case_base: pd.DataFrame) -> pd.DataFrame:
+        """
+        Ubah satu kasus menjadi DataFrame 1 baris dengan kolom dan dtype
+        seperti case base (hasil yang sama dengan membaca barisnya dari SQLite).
+        
+        Args:
+            new_case: Data kasus
+            case_base: Case base aktif
+            
+        Returns:
+            DataFrame 1 baris
+        """
+        # Kolom yang tidak diisi menjadi None, sama seperti NULL dari SQLite
+        row = pd.DataFrame([{col: new_case.get(col) for col in case_base.columns}])
+        
+        for col, dtype in case_base.dtypes.items():
+            if pd.api.types.is_bool_dtype(dtype):
+                # Sama dengan DataLoader._read_database (NULL -> True)
+                row[col] = row[col].fillna(True).astype(bool)
+            elif pd.api.types.is_integer_dtype(dtype) and pd.api.types.is_integer_dtype(row[col]):
+                info = np.iinfo(dtype)
+                if info.min <= row[col].iat[0] <= info.max:
+                    row[col] = row[col].astype(dtype)
+        
+        return row
+    
+    @staticmethod
+    def _within_fit(preprocessor: DataPreprocessor, row: pd.DataFrame) -> bool:
+        """
+        Cek apakah kasus baru tidak mengubah hasil fit preprocessor.
+        
+        Args:
+            preprocessor: Preprocessor aktif
+            row: DataFrame 1 baris kasus baru
+            
+        Returns:
+            True jika semua nilai numerik di dalam [min, max] hasil fit dan
+            Brand/Os sudah ada di encoding
+        """
+        cleaned = preprocessor.add_camera_numeric(row)
+        
+        for col, min_value in preprocessor.min_values.items():
+            if col not in cleaned.columns:
+                continue
+            value = cleaned[col].iat[0]
+            if pd.isna(value) or not min_value <= value <= preprocessor.max_values[col]:
+                return False
+        
+        for col, encoding in (('Brand', preprocessor.brand_encoding), ('Os', preprocessor.os_encoding)):
+            if col in cleaned.columns and cleaned[col].iat[0] not in encoding:
+                return False
+        
+        return True
+    
+    def remove_case(self, phone_id: int) -> bool:
+        """
+        Menghapus kasus dari case base (snapshot baru) dan dari database.
+        
+        Args:
+            phone_id: ID HP yang akan dihapus
+            
+        Returns:
+            True jika kasus ditemukan dan dihapus
+        """
+        with self._write_lock:
+            state = self._state
+            keep = state.ids != phone_id
+            
+            if keep.all():
+                return False
+            
+            case_base = state.case_base[keep].reset_index(drop=True)
+            ids = state.ids[keep]
+            
+            if self.data_loader:
+                self.data_loader.delete_case(phone_id)
+                self.data_loader.df = case_base
+            
+            summaries = (
+                self._build_summaries(self.data_loader, case_base)
+                if self.data_loader
+                else {}
+            )
+            self._state = state._replace(
+                case_base=case_base,
+                case_base_normalized=state.case_base_normalized[keep].reset_index(drop=True),
+                features=state.features[keep],
+                ids=ids,
+                id_index={int(case_id): i for i, case_id in enumerate(ids)},
+                version=state.version + 1,
+                **summaries
+            )
+        
+        logger.info(f"Case {phone_id} removed from case base")
+        return True
         
     def set_weights(self, weights: Dict[str, float]) -> None:
         """
@@ -81,23 +409,28 @@ class CBREngine:
         """
         self.weights = weights
         self.distance_calculator.set_weights(weights)
+        self._weights_view = MappingProxyType(self.weights)
         logger.info(f"Weights updated: {weights}")
         
-    def get_weights(self) -> Dict[str, float]:
+    def get_weights(self) -> Mapping[str, float]:
         """
         Mendapatkan bobot saat ini.
         
         Returns:
-            Dictionary bobot dalam persentase
+            View read-only bobot dalam persentase (tidak di-copy per panggilan)
         """
-        return self.weights.copy()
+        return self._weights_view
     
     # ==================== RETRIEVE PHASE ====================
     def retrieve(
         self, 
         query: Dict[str, Any], 
         top_k: int = 10,
-        min_similarity: float = 0.3
+        min_similarity: float = 0.3,
+        exclude_ids: Optional[List[int]] = None,
+        weights: Optional[Dict[str, float]] = None,
+        similarities: Optional[np.ndarray] = None,
+        similarities_version: Optional[int] = None
     ) -> List[Tuple[int, Dict, float]]:
         """
         RETRIEVE Phase: Mengambil kasus yang mirip dari case base.
@@ -110,6 +443,13 @@ class CBREngine:
                    Contoh: {"Ram": 8, "Harga": 5000000, ...}
             top_k: Jumlah maksimum hasil yang dikembalikan
             min_similarity: Threshold minimum similarity
+            exclude_ids: ID HP yang tidak boleh ikut dalam hasil (optional)
+            weights: Bobot khusus request ini dalam persentase (optional),
+                     bobot engine tidak diubah
+            similarities: Similarity yang sudah dihitung SimilarityBatcher
+                          (optional)
+            similarities_version: Versi case base saat similarities dihitung,
+                                  dihitung ulang jika berbeda dengan versi engine
             
         Returns:
             List of tuples: (index, case_dict, similarity_score)
@@ -120,45 +460,103 @@ class CBREngine:
         
         logger.info(f"RETRIEVE: Searching for similar cases with query: {query}")
         
-        # Normalize query
-        normalized_query = self._prepare_query(query)
-        
-        results = []
+        # Satu snapshot untuk seluruh fase (aman terhadap retain/hapus paralel)
+        state = self._state
         
-        for idx, row in self.case_base_normalized.iterrows():
-            # Prepare case vector
-            case_vector = self._extract_case_vector(row)
-            
-            # Calculate similarity
-            similarity = self.distance_calculator.calculate_similarity(
-                normalized_query, 
-                case_vector
+        # Calculate similarity for all cases at once
+        if similarities is None or similarities_version != state.version:
+            similarities = self._get_distance_calculator(weights).calculate_similarity_matrix(
+                self._prepare_query(query, state),
+                state.features,
+                state.feature_names
             )
-            
-            if similarity >= min_similarity:
-                # Get original case data
-                original_case = self.case_base.iloc[idx].to_dict()
-                results.append((idx, original_case, similarity))
         
-        # Sort by similarity descending
-        results.sort(key=lambda x: x[2], reverse=True)
+        # Sort by similarity descending (stable), keep matches above threshold
+        eligible = similarities >= min_similarity
+        if exclude_ids:
+            eligible &= ~np.isin(state.ids, exclude_ids)
+        
+        candidates = np.flatnonzero(eligible)
         
-        # Return top_k
-        retrieved = results[:top_k]
+        # Partisi O(N) untuk membuang kandidat di luar top_k sebelum sorting
+        # (nilai seri di batas tetap disertakan agar urutan stabil tidak berubah)
+        if 0 < top_k < len(candidates):
+            neg_scores = -similarities[candidates]
+            kth = np.partition(neg_scores, top_k - 1)[top_k - 1]
+            candidates = candidates[neg_scores <= kth]
+        
+        order = candidates[np.argsort(-similarities[candidates], kind='stable')][:top_k]
+        
+        # Get original case data only for the selected cases
+        cases = state.case_base.iloc[order].to_dict('records')
+        retrieved = [
+            (int(idx), case, float(similarities[idx]))
+            for idx, case in zip(order, cases)
+        ]
         
         logger.info(f"RETRIEVE: Found {len(retrieved)} matching cases")
         return retrieved
     
-    def _prepare_query(self, query: Dict[str, Any]) -> Dict[str, float]:
+    def _get_distance_calculator(
+        self,
+        weights: Optional[Dict[str, float]] = None
+    ) -> WeightedEuclideanDistance:
+        """
+        Mendapatkan calculator untuk bobot yang dipakai.
+        
+        Bobot per-request memakai calculator sendiri agar state engine tidak berubah.
+        
+        Args:
+            weights: Bobot khusus request (optional)
+            
+        Returns:
+            WeightedEuclideanDistance instance
+        """
+        if weights is None:
+            return self.distance_calculator
+        return WeightedEuclideanDistance(weights)
+    
+    def similarity_inputs(
+        self,
+        user_input: Dict,
+        weights: Optional[Dict[str, float]] = None
+    ) -> Tuple[np.ndarray, np.ndarray, float]:
+        """
+        Menyusun vektor query dan bobot untuk SimilarityBatcher.
+        
+        Args:
+            user_input: Dictionary berisi preferensi user
+            weights: Bobot khusus request (optional)
+            
+        Returns:
+            Tuple (query_vector, weight_vector, constant)
+        """
+        if not self.is_initialized:
+            raise ValueError("Case base belum dimuat. Panggil load_case_base() terlebih dahulu.")
+        
+        state = self._state
+        normalized_query = self._prepare_query(self._extract_query_from_input(user_input), state)
+        return self._get_distance_calculator(weights).build_query_vectors(
+            normalized_query,
+            state.feature_names
+        )
+    
+    def _prepare_query(
+        self,
+        query: Dict[str, Any],
+        state: Optional[CaseBaseState] = None
+    ) -> Dict[str, float]:
         """
         Prepare dan normalisasi query dari user.
         
         Args:
             query: Raw query dari user
+            state: Snapshot yang preprocessor-nya dipakai (default snapshot aktif)
             
         Returns:
             Normalized query dictionary
         """
+        preprocessor = (state or self._state).preprocessor
         normalized = {}
         
         # Mapping field names
@@ -189,46 +587,21 @@ class CBREngine:
             
             # Handle camera resolution string
             if key.lower() in ['resolusi_kamera', 'camera'] and isinstance(value, str):
-                value = self.preprocessor.parse_camera_resolution(value)
+                value = preprocessor.parse_camera_resolution(value)
                 std_key = 'Resolusi_kamera_num'
             
             if isinstance(value, (int, float)):
                 # Normalize using preprocessor
-                normalized[std_key] = self.preprocessor.normalize_value(value, std_key)
+                normalized[std_key] = preprocessor.normalize_value(value, std_key)
         
         return normalized
     
-    def _extract_case_vector(self, row: pd.Series) -> Dict[str, float]:
-        """
-        Extract normalized feature vector from a case.
-        
-        Args:
-            row: Pandas Series dari case_base_normalized
-            
-        Returns:
-            Dictionary of normalized features
-        """
-        vector = {}
-        
-        feature_columns = [
-            'Harga_norm', 'Ram_norm', 'Memori_internal_norm',
-            'Ukuran_layar_norm', 'Kapasitas_baterai_norm',
-            'Resolusi_kamera_num_norm', 'Rating_pengguna_norm'
-        ]
-        
-        # Map normalized column to standard name
-        for col in feature_columns:
-            std_name = col.replace('_norm', '')
-            if col in row.index:
-                vector[std_name] = row[col] if not pd.isna(row[col]) else 0.5
-        
-        return vector
-    
     # ==================== REUSE PHASE ====================
     def reuse(
         self, 
         retrieved_cases: List[Tuple[int, Dict, float]],
-        user_preferences: Dict = None
+        user_preferences: Dict = None,
+        weights: Optional[Dict[str, float]] = None
     ) -> List[Dict]:
         """
         REUSE Phase: Menggunakan kasus yang ditemukan sebagai solusi.
@@ -240,6 +613,7 @@ class CBREngine:
         Args:
             retrieved_cases: Hasil dari fase RETRIEVE
             user_preferences: Preferensi tambahan user
+            weights: Bobot khusus request ini (optional), default bobot engine
             
         Returns:
             List of recommendation dictionaries
@@ -247,6 +621,7 @@ class CBREngine:
         logger.info("REUSE: Preparing recommendations from retrieved cases")
         
         recommendations = []
+        weights = self.weights if weights is None else weights
         
         for rank, (idx, case, similarity) in enumerate(retrieved_cases, 1):
             recommendation = {
@@ -254,7 +629,7 @@ class CBREngine:
                 "phone": case,
                 "similarity_score": similarity,
                 "similarity_percentage": round(similarity * 100, 2),
-                "explanations": self._generate_explanations(case, user_preferences),
+                "explanations": self._generate_explanations(case, user_preferences, weights),
                 "match_highlights": self._generate_highlights(case, user_preferences)
             }
             recommendations.append(recommendation)
@@ -265,7 +640,8 @@ class CBREngine:
     def _generate_explanations(
         self, 
         case: Dict, 
-        user_preferences: Dict = None
+        user_preferences: Dict = None,
+        weights: Optional[Dict[str, float]] = None
     ) -> List[Dict]:
         """
         Generate penjelasan mengapa HP ini direkomendasikan.
@@ -273,11 +649,13 @@ class CBREngine:
         Args:
             case: Data HP yang direkomendasikan
             user_preferences: Preferensi user
+            weights: Bobot untuk kontribusi atribut, default bobot engine
             
         Returns:
             List of explanation dictionaries
         """
         explanations = []
+        weights = self.weights if weights is None else weights
         
         if not user_preferences:
             return explanations
@@ -328,7 +706,7 @@ class CBREngine:
                     "user_value": user_str,
                     "phone_value": case_str,
                     "match_score": round(match_score, 2),
-                    "contribution": round(match_score * self.weights.get(case_key, 10), 2)
+                    "contribution": round(match_score * weights.get(case_key, 10), 2)
                 })
         
         return explanations
@@ -466,6 +844,9 @@ class CBREngine:
             
         Returns:
             True jika berhasil disimpan
+            
+        Raises:
+            ValueError: Jika kolom new_case tidak sesuai tabel case base
         """
         logger.info("RETAIN: Adding new case to case base")
         
@@ -477,18 +858,22 @@ class CBREngine:
                     logger.error(f"RETAIN: Missing required field: {field}")
                     return False
             
-            # Add to case base
-            if self.data_loader:
-                success = self.data_loader.add_new_case(new_case)
-                
-                if success:
-                    # Reload case base
-                    self.load_case_base()
-                    logger.info(f"RETAIN: New case added successfully")
-                    return True
+            # Add to case base (INSERT + snapshot baru satu unit agar ID baru tidak bentrok)
+            with self._write_lock:
+                if self.data_loader:
+                    success = self.data_loader.add_new_case(new_case)
+                    
+                    if success:
+                        # Snapshot baru dari snapshot aktif + satu baris (tanpa reload tabel)
+                        self._state = self._append_state(new_case)
+                        logger.info(f"RETAIN: New case added successfully")
+                        return True
             
             return False
             
+        except ValueError:
+            # Data kasus tidak valid: diteruskan agar route membalas 400
+            raise
         except Exception as e:
             logger.error(f"RETAIN: Error adding new case: {e}")
             return False
@@ -499,7 +884,10 @@ class CBREngine:
         user_input: Dict,
         top_k: int = 10,
         min_similarity: float = 0.3,
-        apply_filters: bool = True
+        apply_filters: bool = True,
+        weights: Optional[Dict[str, float]] = None,
+        similarities: Optional[np.ndarray] = None,
+        similarities_version: Optional[int] = None
     ) -> Dict:
         """
         Main method untuk mendapatkan rekomendasi HP.
@@ -514,6 +902,9 @@ class CBREngine:
             top_k: Jumlah rekomendasi maksimum
             min_similarity: Threshold minimum similarity
             apply_filters: Apakah apply filter tambahan
+            weights: Bobot khusus request ini (optional), default bobot engine
+            similarities: Similarity dari SimilarityBatcher (optional)
+            similarities_version: Versi case base dari SimilarityBatcher (optional)
             
         Returns:
             Dictionary berisi rekomendasi lengkap
@@ -524,10 +915,17 @@ class CBREngine:
         query = self._extract_query_from_input(user_input)
         
         # RETRIEVE
-        retrieved = self.retrieve(query, top_k=top_k * 2, min_similarity=min_similarity)
+        retrieved = self.retrieve(
+            query,
+            top_k=top_k * 2,
+            min_similarity=min_similarity,
+            weights=weights,
+            similarities=similarities,
+            similarities_version=similarities_version
+        )
         
         # REUSE
-        recommendations = self.reuse(retrieved, user_input)
+        recommendations = self.reuse(retrieved, user_input, weights=weights)
         
         # REVISE
         if apply_filters:
@@ -547,9 +945,9 @@ class CBREngine:
             "message": f"Ditemukan {len(recommendations)} rekomendasi HP",
             "total_results": len(recommendations),
             "query_summary": self._summarize_query(user_input),
-            "weights_used": self.weights,
+            "weights_used": self.weights if weights is None else weights,
             "recommendations": recommendations,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         }
         
         return response
@@ -623,6 +1021,24 @@ class CBREngine:
         
         return summary
     
+    def get_case(self, phone_id: int) -> Optional[Dict]:
+        """
+        Mengambil data satu HP berdasarkan ID (lookup O(1) via index).
+        
+        Args:
+            phone_id: ID HP
+            
+        Returns:
+            Dictionary data HP, atau None jika tidak ditemukan
+        """
+        state = self._state
+        row = state.id_index.get(phone_id)
+        
+        if row is None:
+            return None
+        
+        return state.case_base.iloc[row].to_dict()
+    
     def get_statistics(self) -> Dict:
         """
         Mendapatkan statistik case base.
@@ -633,27 +1049,41 @@ class CBREngine:
         if not self.is_initialized:
             return {"error": "Case base belum dimuat"}
         
-        return self.data_loader.get_statistics()
-
+        return self._state.stats
+    
+    def get_brands(self) -> Tuple[List[str], Dict[str, int]]:
+        """
+        Mendapatkan daftar brand (terurut) dan jumlah HP per brand.
+        
+        Returns:
+            Tuple (brands, brand_counts)
+        """
+        state = self._state
+        return state.brands, state.brand_counts
+    
+    def get_price_range(self) -> Dict[str, int]:
+        """
+        Mendapatkan harga minimum, maksimum, dan rata-rata case base.
+        
+        Returns:
+            Dictionary berisi min_price, max_price, avg_price
+        """
+        return self._state.price_range
 
-# Singleton instance
-_cbr_engine: Optional[CBREngine] = None
 
-def get_cbr_engine() -> CBREngine:
+def create_cbr_engine() -> CBREngine:
     """
-    Factory function untuk mendapatkan CBR Engine instance.
+    Factory function untuk membuat CBR Engine dan memuat case base.
+    Dipanggil sekali saat startup; instance disimpan di app.state.engine.
     
     Returns:
         CBREngine instance yang sudah di-initialize
     """
-    global _cbr_engine
-    
-    if _cbr_engine is None:
-        _cbr_engine = CBREngine()
-        try:
-            _cbr_engine.load_case_base()
-        except Exception as e:
-            logger.error(f"Failed to initialize CBR engine: {e}")
-            # Return engine with empty case base for error handling
+    engine = CBREngine()
+    try:
+        engine.load_case_base()
+    except Exception as e:
+        logger.error(f"Failed to initialize CBR engine: {e}")
+        # Return engine with empty case base for error handling
     
-    return _cbr_engine
+    return engine
@@ -26,7 +26,6 @@ from datetime import datetime
 import logging
 import json
 import os
-from collections import Counter
 from pathlib import Path
 
 from sklearn.metrics import (
@@ -38,7 +37,8 @@ from sklearn.metrics import (
 )
 
 from .weighted_euclidean import WeightedEuclideanDistance
-from ..utils.data_loader import DataLoader
+from ._kernels import weighted_euclidean
+from ..utils.data_loader import DataLoader, processed_path, read_processed
 from ..utils.preprocessing import DataPreprocessor
 from ..models.evaluation import (
     EvaluationMetrics, 
@@ -51,6 +51,34 @@ from ..config import settings
 logger = logging.getLogger(__name__)
 
 
+def majority_vote(neighbor_labels: np.ndarray) -> np.ndarray:
+    """
+    Majority voting label tetangga untuk banyak query sekaligus.
+    
+    Label dipetakan ke kode integer lalu dihitung dengan one-hot sum.
+    Jika seri, dipilih label yang muncul paling awal di urutan tetangga
+    (sama dengan Counter.most_common).
+    
+    Args:
+        neighbor_labels: Matriks label tetangga (n_query, k), urut terdekat dulu
+        
+    Returns:
+        Array label prediksi (n_query,)
+    """
+    names, codes = np.unique(neighbor_labels, return_inverse=True)
+    codes = codes.reshape(neighbor_labels.shape)
+    
+    one_hot = codes[:, :, None] == np.arange(len(names))
+    votes = one_hot.sum(axis=1)
+    
+    # Posisi kemunculan pertama label dengan suara terbanyak (lainnya = k)
+    k = neighbor_labels.shape[1]
+    first = np.where(one_hot.any(axis=1), one_hot.argmax(axis=1), k)
+    first = np.where(votes == votes.max(axis=1, keepdims=True), first, k)
+    
+    return names[first.argmin(axis=1)]
+
+
 class ModelEvaluator:
     """
     Class untuk mengevaluasi performa model CBR.
@@ -74,6 +102,17 @@ class ModelEvaluator:
     
     LABELS = ['Gaming', 'Photographer', 'Daily']
     
+    # Mapping: weight_key -> kolom ternormalisasi
+    FEATURE_MAP = {
+        'Harga': 'Harga_norm',
+        'Ram': 'Ram_norm',
+        'Memori_internal': 'Memori_internal_norm',
+        'Kapasitas_baterai': 'Kapasitas_baterai_norm',
+        'Ukuran_layar': 'Ukuran_layar_norm',
+        'Rating_pengguna': 'Rating_pengguna_norm',
+        'Resolusi_kamera_num': 'Resolusi_kamera_num_norm'
+    }
+    
     def __init__(self, weights: Dict[str, float] = None, k: int = 5):
         """
         Inisialisasi evaluator.
@@ -87,7 +126,13 @@ class ModelEvaluator:
         self.preprocessor = DataPreprocessor()
         self.distance_calculator = WeightedEuclideanDistance(self.weights)
         
+        # (train_normalized, train_df, atribut, matriks fitur, label) untuk predict_label
+        self._train_cache: Optional[Tuple[pd.DataFrame, pd.DataFrame, List[str], np.ndarray, np.ndarray]] = None
+        
         self.evaluation_results: List[EvaluationResult] = []
+        self.results_by_name: Dict[str, EvaluationResult] = {}
+        # Naik setiap kali hasil evaluasi berubah (kunci cache di routes)
+        self.results_version = 0
         
     def load_processed_data(self, scenario_name: str = "70-30") -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
@@ -104,8 +149,8 @@ class ModelEvaluator:
         project_root = current_file.parent.parent.parent.parent  # Final_Project
         processed_dir = project_root / "data" / "processed"
         
-        train_path = processed_dir / f"train_{scenario_name}.csv"
-        test_path = processed_dir / f"test_{scenario_name}.csv"
+        train_path = processed_path(processed_dir, f"train_{scenario_name}")
+        test_path = processed_path(processed_dir, f"test_{scenario_name}")
         
         if not train_path.exists() or not test_path.exists():
             raise FileNotFoundError(
@@ -113,8 +158,8 @@ class ModelEvaluator:
                 f"Run prepare_data.py first."
             )
         
-        train_df = pd.read_csv(train_path)
-        test_df = pd.read_csv(test_path)
+        train_df = read_processed(train_path)
+        test_df = read_processed(test_path)
         
         logger.info(f"Loaded {len(train_df)} training and {len(test_df)} testing samples")
         
@@ -134,18 +179,8 @@ class ModelEvaluator:
         """
         norm_row = normalized_df.loc[idx] if idx in normalized_df.index else normalized_df.iloc[0]
         
-        feature_map = {
-            'Harga': 'Harga_norm',
-            'Ram': 'Ram_norm',
-            'Memori_internal': 'Memori_internal_norm',
-            'Kapasitas_baterai': 'Kapasitas_baterai_norm',
-            'Ukuran_layar': 'Ukuran_layar_norm',
-            'Rating_pengguna': 'Rating_pengguna_norm',
-            'Resolusi_kamera_num': 'Resolusi_kamera_num_norm'
-        }
-        
         features = {}
-        for weight_key, col_name in feature_map.items():
+        for weight_key, col_name in self.FEATURE_MAP.items():
             if col_name in norm_row.index:
                 val = norm_row.get(col_name, 0)
                 features[weight_key] = float(val) if pd.notna(val) else 0.0
@@ -175,34 +210,111 @@ class ModelEvaluator:
         Returns:
             Label prediksi (Gaming/Photographer/Daily)
         """
-        similarities = []
-        
-        for idx in train_df.index:
-            case_features = self.extract_features(train_df.loc[idx], train_normalized, idx)
-            
-            # Calculate similarity
-            similarity = self.distance_calculator.calculate_similarity(
-                query_features, 
-                case_features
+        # Matriks fitur dan array label training dibangun sekali per DataFrame training
+        cache = self._train_cache
+        if cache is None or cache[0] is not train_normalized or cache[1] is not train_df:
+            attributes, columns, _ = self._feature_columns(train_normalized)
+            cache = self._train_cache = (
+                train_normalized,
+                train_df,
+                attributes,
+                self._feature_matrix(train_normalized, columns),
+                train_df['Label'].to_numpy()
             )
-            
-            # Get original label
-            label = train_df.loc[idx, 'Label']
-            similarities.append((idx, similarity, label))
+        _, _, attributes, train_X, train_labels = cache
         
-        # Sort by similarity (descending)
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        # Similarity ke semua case dalam satu panggilan kernel
+        similarities = self.distance_calculator.calculate_similarity_matrix(
+            query_features, train_X, attributes
+        )
         
-        # Get top-k neighbors
-        top_k = similarities[:self.k]
+        # Get top-k neighbors (stable: urutan sama dengan sort similarity descending)
+        top_k = np.argsort(-similarities, kind='stable')[:self.k]
         
         # Majority voting
-        labels = [item[2] for item in top_k]
-        label_counts = Counter(labels)
-        predicted_label = label_counts.most_common(1)[0][0]
+        predicted_label = majority_vote(train_labels[top_k][None, :])[0]
         
         return predicted_label
     
+    def _feature_columns(self, normalized_df: pd.DataFrame) -> Tuple[List[str], List[str], np.ndarray]:
+        """
+        Menentukan kolom fitur dan vektor bobot yang dipakai kernel distance.
+        
+        Urutan mengikuti bobot ternormalisasi; atribut tanpa kolom
+        di data dilewati (sama seperti calculate_distance).
+        
+        Args:
+            normalized_df: DataFrame yang sudah dinormalisasi
+            
+        Returns:
+            Tuple (list atribut, list nama kolom, vektor bobot float32)
+        """
+        attributes = []
+        columns = []
+        weights = []
+        
+        for attr, weight in self.distance_calculator._normalized_weights.items():
+            col_name = self.FEATURE_MAP.get(attr)
+            if col_name is None:
+                continue
+            if col_name not in normalized_df.columns:
+                # Fallback to original column
+                col_name = attr.replace('_num', '')
+                if col_name not in normalized_df.columns:
+                    continue
+            attributes.append(attr)
+            columns.append(col_name)
+            weights.append(weight)
+        
+        return attributes, columns, np.asarray(weights, dtype=np.float32)
+    
+    def _feature_matrix(self, normalized_df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+        """
+        Proyeksi DataFrame ternormalisasi ke matriks float32 contiguous.
+        
+        Args:
+            normalized_df: DataFrame yang sudah dinormalisasi
+            columns: Kolom fitur (dari _feature_columns)
+            
+        Returns:
+            Matriks fitur (n_rows, n_features)
+        """
+        return np.ascontiguousarray(
+            normalized_df[columns].fillna(0.0).to_numpy(dtype=np.float32)
+        )
+    
+    def predict_labels(
+        self,
+        test_normalized: pd.DataFrame,
+        train_df: pd.DataFrame,
+        train_normalized: pd.DataFrame
+    ) -> List[str]:
+        """
+        Prediksi label untuk semua test case sekaligus.
+        
+        Distance dihitung dalam satu panggilan kernel untuk seluruh
+        pasangan test x train, lalu majority voting K tetangga terdekat.
+        
+        Args:
+            test_normalized: DataFrame testing yang sudah dinormalisasi
+            train_df: DataFrame training (dengan label asli)
+            train_normalized: DataFrame training yang sudah dinormalisasi
+            
+        Returns:
+            List label prediksi, urut sesuai test_normalized
+        """
+        _, columns, w = self._feature_columns(train_normalized)
+        train_X = self._feature_matrix(train_normalized, columns)
+        test_X = self._feature_matrix(test_normalized, columns)
+        train_labels = train_df['Label'].to_numpy()
+        
+        distances = weighted_euclidean(train_X, test_X, w)
+        
+        # Stable sort: urutan sama dengan sort similarity descending
+        top_k = np.argsort(distances, axis=1, kind='stable')[:, :self.k]
+        
+        return majority_vote(train_labels[top_k]).tolist()
+    
     def evaluate_scenario(
         self, 
         train_ratio: float = 0.7,
@@ -230,35 +342,17 @@ class ModelEvaluator:
             logger.error(str(e))
             raise
         
-        # Fit preprocessor on training data
-        self.preprocessor.fit(train_df)
-        
-        # Transform both datasets
-        train_normalized = self.preprocessor.transform(train_df.copy())
-        test_normalized = self.preprocessor.transform(test_df.copy())
+        # Fit preprocessor on training data (cleaning training cukup sekali);
+        # transform tidak mengubah input, jadi tidak perlu copy
+        train_normalized = self.preprocessor.fit_transform(train_df)
+        test_normalized = self.preprocessor.transform(test_df)
         
         # Evaluate on test set
-        y_true = []
-        y_pred = []
-        
         total = len(test_df)
         logger.info(f"Evaluating {total} test samples with K={self.k}")
         
-        for i, idx in enumerate(test_df.index):
-            if (i + 1) % 50 == 0:
-                logger.info(f"Progress: {i+1}/{total} ({(i+1)/total*100:.1f}%)")
-            
-            # Extract features from test case
-            query_features = self.extract_features(test_df.loc[idx], test_normalized, idx)
-            
-            # Predict using majority voting
-            predicted = self.predict_label(query_features, train_df, train_normalized)
-            
-            # Get actual label
-            actual = test_df.loc[idx, 'Label']
-            
-            y_true.append(actual)
-            y_pred.append(predicted)
+        y_true = test_df['Label'].tolist()
+        y_pred = self.predict_labels(test_normalized, train_df, train_normalized)
         
         logger.info(f"Evaluation completed: {total}/{total} (100%)")
         
@@ -295,8 +389,11 @@ class ModelEvaluator:
             evaluation_time=datetime.now().isoformat(),
             weights_used=self.weights
         )
+        result.to_dict()  # Build JSON payload once
         
         self.evaluation_results.append(result)
+        self.results_by_name[result.scenario_name] = result
+        self.results_version += 1
         
         logger.info(f"Scenario {scenario_name} - Accuracy: {metrics.accuracy_pct:.2f}%, F1: {metrics.f1_score_pct:.2f}%")
         
@@ -322,7 +419,7 @@ class ModelEvaluator:
                 {"train": 70, "test": 30}
             ]
         
-        self.evaluation_results = []
+        self.set_results([])
         
         for scenario in scenarios:
             train_ratio = scenario["train"] / 100
@@ -346,6 +443,17 @@ class ModelEvaluator:
         
         return comparison
     
+    def set_results(self, results: List[EvaluationResult]) -> None:
+        """
+        Mengganti hasil evaluasi yang tersimpan.
+        
+        Args:
+            results: List hasil evaluasi per skenario
+        """
+        self.evaluation_results = list(results)
+        self.results_by_name = {r.scenario_name: r for r in self.evaluation_results}
+        self.results_version += 1
+    
     def _create_confusion_matrix_data(
         self, 
         cm: np.ndarray
@@ -8,6 +8,8 @@ import numpy as np
 from typing import Dict, List, Optional, Tuple
 import logging
 
+from ._kernels import weighted_sqeuclid
+
 logger = logging.getLogger(__name__)
 
 
@@ -194,6 +196,70 @@ class WeightedEuclideanDistance:
         
         return results
     
+    def build_query_vectors(
+        self,
+        query: Dict[str, float],
+        attributes: List[str]
+    ) -> Tuple[np.ndarray, np.ndarray, float]:
+        """
+        Susun query dan bobot menjadi vektor sesuai urutan kolom matriks fitur.
+        
+        Args:
+            query: Dictionary fitur query (nilai sudah dinormalisasi 0-1)
+            attributes: Nama atribut untuk setiap kolom matriks fitur
+        
+        Returns:
+            Tuple (query_vector, weight_vector, constant); constant adalah
+            kontribusi atribut query yang tidak punya kolom di matriks
+        """
+        column_index = {attr: i for i, attr in enumerate(attributes)}
+        
+        # Atribut yang tidak ada di query mendapat bobot 0
+        query_vector = np.zeros(len(attributes), dtype=np.float32)
+        weight_vector = np.zeros(len(attributes), dtype=np.float32)
+        constant = 0.0
+        
+        for attr, weight in self._normalized_weights.items():
+            # Skip if query doesn't have this attribute
+            if attr not in query:
+                continue
+            
+            if attr in column_index:
+                query_vector[column_index[attr]] = query[attr]
+                weight_vector[column_index[attr]] = weight
+            else:
+                # Case tanpa atribut ini memakai nilai tengah 0.5
+                constant += weight * (query[attr] - 0.5) ** 2
+        
+        return query_vector, weight_vector, constant
+    
+    def calculate_similarity_matrix(
+        self,
+        query: Dict[str, float],
+        case_matrix: np.ndarray,
+        attributes: List[str]
+    ) -> np.ndarray:
+        """
+        Hitung similarity query terhadap seluruh case sekaligus.
+        
+        Hasil setara dengan calculate_similarity per case, tetapi
+        dihitung secara vektor pada matriks fitur (struct-of-arrays).
+        
+        Args:
+            query: Dictionary fitur query (nilai sudah dinormalisasi 0-1)
+            case_matrix: Matriks fitur case (n_cases, n_attributes), float32
+            attributes: Nama atribut untuk setiap kolom case_matrix
+        
+        Returns:
+            Array similarity (n_cases,)
+        """
+        query_vector, weight_vector, constant = self.build_query_vectors(query, attributes)
+        
+        case_matrix = np.ascontiguousarray(case_matrix, dtype=np.float32)
+        squared_diff_sum = weighted_sqeuclid(case_matrix, query_vector, weight_vector)
+        
+        return squared_to_similarity(squared_diff_sum, constant)
+
     def get_attribute_contributions(
         self, 
         query: Dict[str, float], 
@@ -259,6 +325,21 @@ class WeightedEuclideanDistance:
 
 
 # Fungsi helper untuk penggunaan cepat
+def squared_to_similarity(squared_diff_sum: np.ndarray, constant: float = 0.0) -> np.ndarray:
+    """
+    Ubah squared distance hasil kernel menjadi similarity 1 / (1 + d).
+    
+    Args:
+        squared_diff_sum: Squared distance per case, float32
+        constant: Kontribusi atribut tanpa kolom (dari build_query_vectors)
+        
+    Returns:
+        Array similarity (n_cases,)
+    """
+    squared_diff_sum = squared_diff_sum + np.float32(constant)
+    return 1 / (1 + np.sqrt(squared_diff_sum))
+
+
 def calculate_weighted_euclidean(
     query: Dict[str, float],
     case: Dict[str, float],
@@ -5,7 +5,7 @@ Konfigurasi aplikasi CBR
 import os
 from pathlib import Path
 from pydantic_settings import BaseSettings
-from typing import Dict
+from typing import Dict, Optional
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
@@ -26,6 +26,11 @@ class Settings(BaseSettings):
 
     # Dataset Path - Railway Docker compatible
     DATASET_PATH: str = os.getenv("DATASET_PATH", str(BASE_DIR / "data.xlsx"))
+    DATABASE_PATH: str = os.getenv("DATABASE_PATH", str(BASE_DIR / "phones.db"))
+
+    # Response Cache (Redis) - nonaktif jika REDIS_URL kosong
+    REDIS_URL: Optional[str] = os.getenv("REDIS_URL")
+    CACHE_TTL: int = int(os.getenv("CACHE_TTL", "300"))  # detik
 
     # CBR Settings
     # Bobot default dalam PERSENTASE (total harus 100%)
@@ -43,6 +48,10 @@ class Settings(BaseSettings):
     SIMILARITY_THRESHOLD: float = 0.5  # Minimum similarity untuk rekomendasi
     TOP_K_RECOMMENDATIONS: int = 10    # Jumlah rekomendasi maksimum
 
+    # Micro-batching similarity antar request
+    SIMILARITY_BATCH_SIZE: int = int(os.getenv("SIMILARITY_BATCH_SIZE", "64"))
+    SIMILARITY_BATCH_WINDOW_MS: float = float(os.getenv("SIMILARITY_BATCH_WINDOW_MS", "0"))  # 0 = tanpa menunggu
+
     # Evaluation Settings - Hanya 70-30 split
     TRAIN_TEST_SPLITS: list = [
         {"train": 70, "test": 30}
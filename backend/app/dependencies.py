@@ -0,0 +1,33 @@
+"""
+Dependency FastAPI yang dipakai bersama oleh router
+"""
+
+from fastapi import Request
+
+from .cbr import CBREngine, SimilarityBatcher
+
+
+def get_engine(request: Request) -> CBREngine:
+    """
+    Mendapatkan CBR Engine yang dibuat saat startup aplikasi.
+    
+    Args:
+        request: Request yang sedang diproses
+    
+    Returns:
+        CBREngine instance dari app.state
+    """
+    return request.app.state.engine
+
+
+def get_batcher(request: Request) -> SimilarityBatcher:
+    """
+    Mendapatkan SimilarityBatcher yang dijalankan saat startup aplikasi.
+    
+    Args:
+        request: Request yang sedang diproses
+    
+    Returns:
+        SimilarityBatcher instance dari app.state
+    """
+    return request.app.state.batcher
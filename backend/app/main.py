@@ -4,19 +4,22 @@ CBR Phone Recommendation API - FastAPI application
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import anyio
 import logging
 import time
 
 from .config import settings
+from .utils.responses import CBRJSONResponse, CBRRoute
 from .routes import (
     recommendation_router,
     evaluation_router,
     admin_router,
     health_router
 )
-from .cbr import get_cbr_engine
+from .routes.evaluation import shutdown_executor
+from .utils.cache import init_cache, close_cache
+from .cbr import SimilarityBatcher, create_cbr_engine
 
 logging.basicConfig(
     level=logging.INFO,
@@ -32,16 +35,27 @@ async def lifespan(app: FastAPI):
     logger.info("Starting CBR Phone Recommendation API...")
     
     # Pre-load CBR engine dan case base
-    try:
-        engine = get_cbr_engine()
-        logger.info(f"Case base loaded: {len(engine.case_base)} phones")
-    except Exception as e:
-        logger.error(f"Error loading case base: {e}")
+    app.state.engine = await anyio.to_thread.run_sync(create_cbr_engine)
+    if app.state.engine.case_base is not None:
+        logger.info(f"Case base loaded: {len(app.state.engine.case_base)} phones")
+    
+    # Dispatcher micro-batching similarity antar request
+    app.state.batcher = SimilarityBatcher(
+        app.state.engine,
+        max_batch=settings.SIMILARITY_BATCH_SIZE,
+        window_ms=settings.SIMILARITY_BATCH_WINDOW_MS
+    )
+    app.state.batcher.start()
+    
+    await init_cache()
     
     yield
     
     # Shutdown
     logger.info("Shutting down CBR Phone Recommendation API...")
+    shutdown_executor()
+    await app.state.batcher.stop()
+    await close_cache()
 
 
 # Create FastAPI app
@@ -76,10 +90,14 @@ app = FastAPI(
     """,
     version=settings.APP_VERSION,
     lifespan=lifespan,
+    default_response_class=CBRJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc"
 )
 
+# Endpoint yang didaftarkan langsung di app juga diserialisasi CBRJSONResponse
+app.router.route_class = CBRRoute
+
 # CORS Middleware
 app.add_middleware(
     CORSMiddleware,
@@ -110,7 +128,7 @@ async def add_process_time_header(request: Request, call_next):
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler."""
     logger.error(f"Unhandled exception: {exc}")
-    return JSONResponse(
+    return CBRJSONResponse(
         status_code=500,
         content={
             "success": False,
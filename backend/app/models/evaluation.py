@@ -2,7 +2,7 @@
 Pydantic models untuk hasil evaluasi CBR
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import List, Dict, Optional
 from datetime import datetime
 
@@ -68,6 +68,41 @@ class EvaluationResult(BaseModel):
     evaluation_time: str = Field(..., description="Waktu evaluasi dilakukan")
     weights_used: Dict[str, float] = Field(..., description="Bobot yang digunakan saat evaluasi")
     
+    # Cache payload JSON (dibangun sekali per hasil)
+    _payload: Optional[Dict] = PrivateAttr(default=None)
+    
+    def to_dict(self) -> Dict:
+        """
+        Payload JSON skenario untuk response API.
+        
+        Dibangun sekali lalu di-cache pada instance.
+        
+        Returns:
+            Dictionary hasil skenario
+        """
+        if self._payload is None:
+            cm = self.confusion_matrix
+            self._payload = {
+                "name": self.scenario_name,
+                "train_size": self.train_size,
+                "test_size": self.test_size,
+                "metrics": {
+                    "accuracy": self.metrics.accuracy_pct,
+                    "precision": self.metrics.precision_pct,
+                    "recall": self.metrics.recall_pct,
+                    "f1_score": self.metrics.f1_score_pct
+                },
+                "confusion_matrix": {
+                    "matrix": cm.matrix,
+                    "labels": cm.labels,
+                    "tp": cm.true_positives,
+                    "tn": cm.true_negatives,
+                    "fp": cm.false_positives,
+                    "fn": cm.false_negatives
+                }
+            }
+        return self._payload
+    
     class Config:
         json_schema_extra = {
             "example": {
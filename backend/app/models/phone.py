@@ -99,6 +99,8 @@ class PhoneInput(BaseModel):
     )
     
     class Config:
+        extra = "ignore"
+        frozen = True
         json_schema_extra = {
             "example": {
                 "min_harga": 3000000,
@@ -2,15 +2,25 @@
 API endpoints untuk admin dashboard
 """
 
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi.responses import StreamingResponse
 from typing import Dict, List, Optional
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
+import asyncio
+import numpy as np
 
-from ..cbr import get_cbr_engine
+from ..cbr import CBREngine
 from ..config import settings
+from ..dependencies import get_engine
+from ..utils.cache import invalidate_cache
+from ..utils.responses import CBRRoute
 
-router = APIRouter(prefix="/admin", tags=["Admin"])
+router = APIRouter(prefix="/admin", tags=["Admin"], route_class=CBRRoute)
+
+# Batas segmen harga (Rupiah) dan labelnya untuk distribusi dashboard
+_PRICE_THRESHOLDS = np.array([2_000_000, 5_000_000, 10_000_000, 15_000_000], dtype=np.float64)
+_PRICE_LABELS = ["< 2 Juta", "2-5 Juta", "5-10 Juta", "10-15 Juta", "> 15 Juta"]
 
 
 class WeightUpdateRequest(BaseModel):
@@ -50,8 +60,8 @@ class NewPhoneRequest(BaseModel):
     stok_tersedia: bool = Field(True, description="Ketersediaan stok")
 
 
-@router.get("/weights", response_model=Dict)
-async def get_current_weights() -> Dict:
+@router.get("/weights")
+async def get_current_weights(engine: CBREngine = Depends(get_engine)):
     """
     Mendapatkan bobot saat ini.
     
@@ -59,12 +69,11 @@ async def get_current_weights() -> Dict:
     untuk menentukan seberapa penting setiap atribut.
     """
     try:
-        engine = get_cbr_engine()
         weights = engine.get_weights()
         
         return {
             "success": True,
-            "weights": weights,
+            "weights": dict(weights),
             "total": sum(weights.values()),
             "description": {
                 "Harga": "Bobot untuk harga HP",
@@ -84,8 +93,11 @@ async def get_current_weights() -> Dict:
         )
 
 
-@router.put("/weights", response_model=Dict)
-async def update_weights(request: WeightUpdateRequest) -> Dict:
+@router.put("/weights")
+async def update_weights(
+    request: WeightUpdateRequest,
+    engine: CBREngine = Depends(get_engine)
+):
     """
     Update bobot atribut.
     
@@ -108,17 +120,15 @@ async def update_weights(request: WeightUpdateRequest) -> Dict:
     ```
     """
     try:
-        engine = get_cbr_engine()
-        
         old_weights = engine.get_weights()
         engine.set_weights(request.weights)
         
         return {
             "success": True,
             "message": "Bobot berhasil diperbarui",
-            "old_weights": old_weights,
+            "old_weights": dict(old_weights),
             "new_weights": request.weights,
-            "updated_at": datetime.now().isoformat()
+            "updated_at": datetime.now()
         }
         
     except Exception as e:
@@ -128,14 +138,12 @@ async def update_weights(request: WeightUpdateRequest) -> Dict:
         )
 
 
-@router.post("/weights/reset", response_model=Dict)
-async def reset_weights() -> Dict:
+@router.post("/weights/reset")
+async def reset_weights(engine: CBREngine = Depends(get_engine)):
     """
     Reset bobot ke nilai default.
     """
     try:
-        engine = get_cbr_engine()
-        
         old_weights = engine.get_weights()
         default_weights = settings.DEFAULT_WEIGHTS.copy()
         engine.set_weights(default_weights)
@@ -143,7 +151,7 @@ async def reset_weights() -> Dict:
         return {
             "success": True,
             "message": "Bobot berhasil direset ke default",
-            "old_weights": old_weights,
+            "old_weights": dict(old_weights),
             "new_weights": default_weights
         }
         
@@ -154,8 +162,8 @@ async def reset_weights() -> Dict:
         )
 
 
-@router.get("/weight-presets", response_model=Dict)
-async def get_weight_presets() -> Dict:
+@router.get("/weight-presets")
+async def get_weight_presets():
     """
     Mendapatkan preset bobot untuk berbagai skenario.
     
@@ -236,8 +244,11 @@ async def get_weight_presets() -> Dict:
     }
 
 
-@router.post("/phones", response_model=Dict)
-async def add_new_phone(phone: NewPhoneRequest) -> Dict:
+@router.post("/phones")
+async def add_new_phone(
+    phone: NewPhoneRequest,
+    engine: CBREngine = Depends(get_engine)
+):
     """
     Menambahkan HP baru ke database (RETAIN phase).
     
@@ -245,8 +256,6 @@ async def add_new_phone(phone: NewPhoneRequest) -> Dict:
     digunakan untuk rekomendasi selanjutnya.
     """
     try:
-        engine = get_cbr_engine()
-        
         phone_data = {
             "Nama_hp": phone.nama_hp,
             "Brand": phone.brand,
@@ -262,9 +271,11 @@ async def add_new_phone(phone: NewPhoneRequest) -> Dict:
             "Stok_tersedia": phone.stok_tersedia
         }
         
-        success = engine.retain(phone_data)
+        # Tulis ke SQLite di thread terpisah agar event loop tidak terblokir
+        success = await asyncio.to_thread(engine.retain, phone_data)
         
         if success:
+            await invalidate_cache()
             return {
                 "success": True,
                 "message": f"HP '{phone.nama_hp}' berhasil ditambahkan",
@@ -278,6 +289,11 @@ async def add_new_phone(phone: NewPhoneRequest) -> Dict:
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -285,13 +301,12 @@ async def add_new_phone(phone: NewPhoneRequest) -> Dict:
         )
 
 
-@router.get("/dashboard", response_model=Dict)
-async def get_dashboard_data() -> Dict:
+@router.get("/dashboard")
+async def get_dashboard_data(engine: CBREngine = Depends(get_engine)):
     """
     Mendapatkan data untuk admin dashboard.
     """
     try:
-        engine = get_cbr_engine()
         stats = engine.get_statistics()
         
         df = engine.case_base
@@ -299,22 +314,20 @@ async def get_dashboard_data() -> Dict:
         # Calculate distributions
         brand_dist = df['Brand'].value_counts().to_dict()
         os_dist = df['Os'].value_counts().to_dict()
-        ram_dist = df['Ram'].value_counts().sort_index().to_dict()
         
-        # Price segments
-        def get_price_segment(price):
-            if price < 2000000:
-                return "< 2 Juta"
-            elif price < 5000000:
-                return "2-5 Juta"
-            elif price < 10000000:
-                return "5-10 Juta"
-            elif price < 15000000:
-                return "10-15 Juta"
-            else:
-                return "> 15 Juta"
+        # Kategori tanpa HP (mis. setelah delete) tidak ditampilkan
+        brand_dist = {k: v for k, v in brand_dist.items() if v > 0}
+        os_dist = {k: v for k, v in os_dist.items() if v > 0}
+        ram_dist = df['Ram'].value_counts().sort_index().to_dict()
         
-        price_segments = df['Harga'].apply(get_price_segment).value_counts().to_dict()
+        # Price segments (harga NaN masuk segmen terakhir, urutan label tetap)
+        segment_idx = np.digitize(df['Harga'].to_numpy(dtype=np.float64), _PRICE_THRESHOLDS)
+        counts = np.bincount(segment_idx, minlength=len(_PRICE_LABELS))
+        price_segments = {
+            label: int(count)
+            for label, count in zip(_PRICE_LABELS, counts)
+            if count > 0
+        }
         
         return {
             "success": True,
@@ -330,8 +343,8 @@ async def get_dashboard_data() -> Dict:
                 "by_ram": ram_dist,
                 "by_price_segment": price_segments
             },
-            "current_weights": engine.get_weights(),
-            "timestamp": datetime.now().isoformat()
+            "current_weights": dict(engine.get_weights()),
+            "timestamp": datetime.now()
         }
         
     except Exception as e:
@@ -341,36 +354,26 @@ async def get_dashboard_data() -> Dict:
         )
 
 
-@router.delete("/phones/{phone_id}", response_model=Dict)
-async def delete_phone(phone_id: int) -> Dict:
+@router.delete("/phones/{phone_id}")
+async def delete_phone(
+    phone_id: int,
+    engine: CBREngine = Depends(get_engine)
+):
     """
     Menghapus HP dari database.
     
     **WARNING:** Operasi ini tidak dapat dibatalkan.
     """
     try:
-        engine = get_cbr_engine()
-        
-        # Check if phone exists
-        phone = engine.case_base[engine.case_base['Id_hp'] == phone_id]
-        
-        if phone.empty:
+        # Hapus dari case base dan database (di thread, menunggu write lock engine)
+        removed = await asyncio.to_thread(engine.remove_case, phone_id)
+        if not removed:
             raise HTTPException(
                 status_code=404,
                 detail=f"HP dengan ID {phone_id} tidak ditemukan"
             )
         
-        # Remove from dataframe
-        engine.case_base = engine.case_base[engine.case_base['Id_hp'] != phone_id]
-        
-        # Save to file
-        if engine.data_loader:
-            engine.data_loader.df = engine.case_base
-            engine.data_loader.df.to_excel(
-                engine.data_loader.file_path, 
-                index=False, 
-                engine='openpyxl'
-            )
+        await invalidate_cache()
         
         return {
             "success": True,
@@ -384,3 +387,32 @@ async def delete_phone(phone_id: int) -> Dict:
             status_code=500,
             detail=f"Error: {str(e)}"
         )
+
+
+@router.get("/export")
+async def export_phones(engine: CBREngine = Depends(get_engine)) -> StreamingResponse:
+    """
+    Export seluruh data HP dari database ke file Excel (.xlsx).
+    """
+    try:
+        if not engine.data_loader:
+            raise HTTPException(
+                status_code=503,
+                detail="Database belum dimuat"
+            )
+        
+        buffer = await asyncio.to_thread(engine.data_loader.export_excel)
+        
+        return StreamingResponse(
+            buffer,
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers={"Content-Disposition": 'attachment; filename="data.xlsx"'}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error: {str(e)}"
+        )
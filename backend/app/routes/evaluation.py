@@ -6,11 +6,167 @@ from fastapi import APIRouter, HTTPException, BackgroundTasks
 from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache, partial
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import uuid
 
-from ..cbr import get_evaluator
-from ..models.evaluation import EvaluationRequest
+from ..cbr import ModelEvaluator, get_evaluator
+from ..models.evaluation import EvaluationRequest, EvaluationComparison
+from ..utils.responses import CBRRoute
 
-router = APIRouter(prefix="/evaluation", tags=["Evaluation"])
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/evaluation", tags=["Evaluation"], route_class=CBRRoute)
+
+# Job evaluasi yang berjalan di background (in-memory, per worker, urut submit).
+# Job selesai tetap bisa di-poll ulang; job selesai tertua dibuang jika jumlah
+# job melebihi MAX_JOBS
+JOBS: Dict[str, Future] = {}
+MAX_JOBS = 100
+
+# Nomor urut submit job; hasil hanya dipublikasikan ke evaluator jika
+# nomornya lebih baru dari hasil yang sedang tampil
+_job_seq = itertools.count(1)
+_published_seq = 0
+
+# Process pool untuk evaluasi (CPU-bound, thread akan terhambat GIL)
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """
+    Mendapatkan process pool untuk job evaluasi (dibuat saat pertama dipakai).
+    
+    Returns:
+        ProcessPoolExecutor instance
+    """
+    global _executor
+    
+    if _executor is None:
+        # spawn: fork setelah thread pool Numba/BLAS aktif tidak aman
+        _executor = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Menghentikan process pool evaluasi saat aplikasi shutdown."""
+    global _executor
+    
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _run_evaluation_job(
+    scenarios: List[Dict[str, int]],
+    similarity_threshold: float,
+    weights: Optional[Dict[str, float]] = None
+) -> EvaluationComparison:
+    """
+    Menjalankan evaluasi di dalam worker process.
+    
+    Args:
+        scenarios: Skenario train-test split
+        similarity_threshold: Threshold similarity
+        weights: Bobot kustom (optional)
+        
+    Returns:
+        EvaluationComparison hasil evaluasi
+    """
+    evaluator = ModelEvaluator(weights=weights)
+    return evaluator.evaluate_all_scenarios(
+        scenarios=scenarios,
+        similarity_threshold=similarity_threshold
+    )
+
+
+def _register_job(job_id: str, future: Future) -> None:
+    """
+    Menyimpan job baru dan membuang job selesai tertua di atas MAX_JOBS.
+    
+    Args:
+        job_id: ID job
+        future: Future dari process pool
+    """
+    JOBS[job_id] = future
+    
+    excess = len(JOBS) - MAX_JOBS
+    if excess > 0:
+        finished = [jid for jid, job in JOBS.items() if job.done()]
+        for jid in finished[:excess]:
+            del JOBS[jid]
+
+
+def _on_job_done(loop: asyncio.AbstractEventLoop, seq: int, future: Future) -> None:
+    """
+    Callback saat job selesai (dipanggil di thread milik process pool).
+    
+    Hasil diteruskan ke event loop agar evaluator singleton hanya diubah
+    di thread yang sama dengan endpoint results/visualization/compare/export.
+    
+    Args:
+        loop: Event loop aplikasi
+        seq: Nomor urut submit job
+        future: Future job yang selesai
+    """
+    if future.cancelled() or future.exception() is not None:
+        return
+    
+    try:
+        loop.call_soon_threadsafe(_publish_results, seq, future.result())
+    except RuntimeError:
+        # Event loop sudah ditutup (aplikasi shutdown)
+        pass
+
+
+def _publish_results(seq: int, comparison: EvaluationComparison) -> None:
+    """
+    Menyimpan hasil job ke evaluator singleton (di event loop).
+    
+    Job yang selesai belakangan tetapi di-submit lebih dulu tidak
+    menimpa hasil job yang lebih baru.
+    
+    Args:
+        seq: Nomor urut submit job
+        comparison: Hasil evaluasi job
+    """
+    global _published_seq
+    
+    if seq < _published_seq:
+        logger.info(f"Hasil evaluasi job #{seq} dilewati (job #{_published_seq} lebih baru)")
+        return
+    
+    _published_seq = seq
+    get_evaluator().set_results(comparison.scenarios)
+
+
+def _build_run_payload(comparison: EvaluationComparison) -> Dict:
+    """
+    Membangun response hasil evaluasi.
+    
+    Args:
+        comparison: Hasil evaluate_all_scenarios
+        
+    Returns:
+        Dictionary response
+    """
+    return {
+        "success": True,
+        "message": "Evaluation completed successfully",
+        "best_scenario": comparison.best_scenario,
+        "scenarios": [result.to_dict() for result in comparison.scenarios],
+        "comparison_summary": comparison.comparison_summary,
+        "timestamp": datetime.now()
+    }
 
 
 class EvaluationConfig(BaseModel):
@@ -33,13 +189,13 @@ class EvaluationConfig(BaseModel):
     )
 
 
-@router.post("/run", response_model=Dict)
-async def run_evaluation(config: EvaluationConfig) -> Dict:
+@router.post("/run", status_code=202)
+async def run_evaluation(config: EvaluationConfig):
     """
-    Menjalankan evaluasi model CBR.
+    Menjalankan evaluasi model CBR di background.
     
     Evaluasi dilakukan dengan skenario yang ditentukan:
-    - Default: 70-30 dan 80-20 split
+    - Default: 70-30 split
     
     Metrik yang dihitung:
     - Accuracy
@@ -48,49 +204,28 @@ async def run_evaluation(config: EvaluationConfig) -> Dict:
     - F1-Score
     
     Returns:
-        Hasil evaluasi lengkap dengan perbandingan skenario
+        job_id untuk polling hasil di /evaluation/results/{job_id}
     """
     try:
-        evaluator = get_evaluator()
-        
-        # Set custom weights if provided
-        if config.custom_weights:
-            evaluator.weights = config.custom_weights
+        job_id = uuid.uuid4().hex
         
-        # Run all scenarios
-        comparison = evaluator.evaluate_all_scenarios(
-            scenarios=config.scenarios,
-            similarity_threshold=config.similarity_threshold
+        future = _get_executor().submit(
+            _run_evaluation_job,
+            config.scenarios,
+            config.similarity_threshold,
+            config.custom_weights
+        )
+        future.add_done_callback(
+            partial(_on_job_done, asyncio.get_running_loop(), next(_job_seq))
         )
+        _register_job(job_id, future)
+        
+        logger.info(f"Evaluation job submitted: {job_id}")
         
         return {
             "success": True,
-            "message": "Evaluation completed successfully",
-            "best_scenario": comparison.best_scenario,
-            "scenarios": [
-                {
-                    "name": result.scenario_name,
-                    "train_size": result.train_size,
-                    "test_size": result.test_size,
-                    "metrics": {
-                        "accuracy": result.metrics.accuracy_pct,
-                        "precision": result.metrics.precision_pct,
-                        "recall": result.metrics.recall_pct,
-                        "f1_score": result.metrics.f1_score_pct
-                    },
-                    "confusion_matrix": {
-                        "matrix": result.confusion_matrix.matrix,
-                        "labels": result.confusion_matrix.labels,
-                        "tp": result.confusion_matrix.true_positives,
-                        "tn": result.confusion_matrix.true_negatives,
-                        "fp": result.confusion_matrix.false_positives,
-                        "fn": result.confusion_matrix.false_negatives
-                    }
-                }
-                for result in comparison.scenarios
-            ],
-            "comparison_summary": comparison.comparison_summary,
-            "timestamp": datetime.now().isoformat()
+            "job_id": job_id,
+            "status": "running"
         }
         
     except Exception as e:
@@ -100,8 +235,48 @@ async def run_evaluation(config: EvaluationConfig) -> Dict:
         )
 
 
-@router.get("/results", response_model=Dict)
-async def get_evaluation_results() -> Dict:
+@router.get("/results/{job_id}")
+async def get_job_result(job_id: str):
+    """
+    Mendapatkan status dan hasil job evaluasi.
+    
+    Job yang sudah selesai tidak dihapus saat diambil, sehingga poll yang
+    diulang (misalnya karena response sebelumnya hilang) tetap mendapat hasil.
+    
+    Args:
+        job_id: ID job dari POST /evaluation/run
+    """
+    future = JOBS.get(job_id)
+    
+    if future is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    if not future.done():
+        return {
+            "success": True,
+            "job_id": job_id,
+            "status": "running"
+        }
+    
+    if future.cancelled():
+        raise HTTPException(status_code=500, detail=f"Job {job_id} was cancelled")
+    
+    error = future.exception()
+    if error is not None:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error running evaluation: {str(error)}"
+        )
+    
+    return {
+        **_build_run_payload(future.result()),
+        "job_id": job_id,
+        "status": "completed"
+    }
+
+
+@router.get("/results")
+async def get_evaluation_results():
     """
     Mendapatkan hasil evaluasi terakhir.
     """
@@ -139,8 +314,8 @@ async def get_evaluation_results() -> Dict:
         )
 
 
-@router.get("/visualization-data", response_model=Dict)
-async def get_visualization_data() -> Dict:
+@router.get("/visualization-data")
+async def get_visualization_data():
     """
     Mendapatkan data untuk visualisasi hasil evaluasi.
     
@@ -173,8 +348,8 @@ async def get_visualization_data() -> Dict:
         )
 
 
-@router.post("/export", response_model=Dict)
-async def export_results() -> Dict:
+@router.post("/export")
+async def export_results():
     """
     Export hasil evaluasi ke file JSON.
     """
@@ -204,8 +379,62 @@ async def export_results() -> Dict:
         )
 
 
-@router.get("/compare/{scenario1}/{scenario2}", response_model=Dict)
-async def compare_scenarios(scenario1: str, scenario2: str) -> Dict:
+@lru_cache(maxsize=128)
+def _compare_payload(scenario1: str, scenario2: str, results_version: int) -> Dict:
+    """
+    Membangun payload perbandingan dua skenario.
+    
+    Di-cache per pasangan skenario; results_version memastikan cache
+    tidak dipakai lagi setelah evaluasi baru dijalankan.
+    
+    Args:
+        scenario1: Nama skenario pertama
+        scenario2: Nama skenario kedua
+        results_version: Versi hasil evaluasi saat ini
+    """
+    evaluator = get_evaluator()
+    s1 = evaluator.results_by_name[scenario1]
+    s2 = evaluator.results_by_name[scenario2]
+    
+    # Calculate differences
+    diff = {
+        "accuracy": round(s1.metrics.accuracy_pct - s2.metrics.accuracy_pct, 2),
+        "precision": round(s1.metrics.precision_pct - s2.metrics.precision_pct, 2),
+        "recall": round(s1.metrics.recall_pct - s2.metrics.recall_pct, 2),
+        "f1_score": round(s1.metrics.f1_score_pct - s2.metrics.f1_score_pct, 2)
+    }
+    
+    # Determine better scenario
+    better = scenario1 if s1.metrics.f1_score > s2.metrics.f1_score else scenario2
+    
+    return {
+        "success": True,
+        "scenario1": {
+            "name": scenario1,
+            "metrics": {
+                "accuracy": s1.metrics.accuracy_pct,
+                "precision": s1.metrics.precision_pct,
+                "recall": s1.metrics.recall_pct,
+                "f1_score": s1.metrics.f1_score_pct
+            }
+        },
+        "scenario2": {
+            "name": scenario2,
+            "metrics": {
+                "accuracy": s2.metrics.accuracy_pct,
+                "precision": s2.metrics.precision_pct,
+                "recall": s2.metrics.recall_pct,
+                "f1_score": s2.metrics.f1_score_pct
+            }
+        },
+        "difference": diff,
+        "better_scenario": better,
+        "recommendation": f"Scenario {better} shows better performance based on F1-Score"
+    }
+
+
+@router.get("/compare/{scenario1}/{scenario2}")
+async def compare_scenarios(scenario1: str, scenario2: str):
     """
     Membandingkan dua skenario evaluasi.
     
@@ -223,49 +452,15 @@ async def compare_scenarios(scenario1: str, scenario2: str) -> Dict:
             )
         
         # Find scenarios
-        s1 = next((r for r in evaluator.evaluation_results if r.scenario_name == scenario1), None)
-        s2 = next((r for r in evaluator.evaluation_results if r.scenario_name == scenario2), None)
+        s1 = evaluator.results_by_name.get(scenario1)
+        s2 = evaluator.results_by_name.get(scenario2)
         
         if not s1:
             raise HTTPException(status_code=404, detail=f"Scenario {scenario1} not found")
         if not s2:
             raise HTTPException(status_code=404, detail=f"Scenario {scenario2} not found")
         
-        # Calculate differences
-        diff = {
-            "accuracy": round(s1.metrics.accuracy_pct - s2.metrics.accuracy_pct, 2),
-            "precision": round(s1.metrics.precision_pct - s2.metrics.precision_pct, 2),
-            "recall": round(s1.metrics.recall_pct - s2.metrics.recall_pct, 2),
-            "f1_score": round(s1.metrics.f1_score_pct - s2.metrics.f1_score_pct, 2)
-        }
-        
-        # Determine better scenario
-        better = scenario1 if s1.metrics.f1_score > s2.metrics.f1_score else scenario2
-        
-        return {
-            "success": True,
-            "scenario1": {
-                "name": scenario1,
-                "metrics": {
-                    "accuracy": s1.metrics.accuracy_pct,
-                    "precision": s1.metrics.precision_pct,
-                    "recall": s1.metrics.recall_pct,
-                    "f1_score": s1.metrics.f1_score_pct
-                }
-            },
-            "scenario2": {
-                "name": scenario2,
-                "metrics": {
-                    "accuracy": s2.metrics.accuracy_pct,
-                    "precision": s2.metrics.precision_pct,
-                    "recall": s2.metrics.recall_pct,
-                    "f1_score": s2.metrics.f1_score_pct
-                }
-            },
-            "difference": diff,
-            "better_scenario": better,
-            "recommendation": f"Scenario {better} shows better performance based on F1-Score"
-        }
+        return _compare_payload(scenario1, scenario2, evaluator.results_version)
         
     except HTTPException:
         raise
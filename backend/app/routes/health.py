@@ -4,48 +4,67 @@ Health Check Routes
 Endpoint untuk health check dan status aplikasi.
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from typing import Dict
 from datetime import datetime
 
-router = APIRouter(prefix="/health", tags=["Health"])
+from ..cbr import CBREngine
+from ..config import settings
+from ..dependencies import get_engine
+from ..utils.responses import CBRRoute
+
+router = APIRouter(prefix="/health", tags=["Health"], route_class=CBRRoute)
+
+# Bagian statis dari payload health/info - dibangun sekali saat import,
+# tiap request hanya menambahkan timestamp baru
+_HEALTH_BASE: Dict = {
+    "status": "healthy",
+    "message": "CBR Phone Recommendation API is running",
+    "version": settings.APP_VERSION
+}
+
+_INFO_BASE: Dict = {
+    "app_name": settings.APP_NAME,
+    "version": settings.APP_VERSION,
+    "description": "Sistem Rekomendasi Handphone berbasis Case-Based Reasoning",
+    "algorithm": "Weighted Euclidean Distance",
+    "features": [
+        "Phone recommendation based on user preferences",
+        "Customizable attribute weights",
+        "Model evaluation with multiple scenarios",
+        "Admin dashboard for weight management"
+    ],
+    "documentation": "/docs"
+}
 
 
 @router.get("/")
-async def health_check() -> Dict:
+async def health_check():
     """
     Basic health check endpoint.
     
     Returns:
         Status aplikasi
     """
-    return {
-        "status": "healthy",
-        "message": "CBR Phone Recommendation API is running",
-        "timestamp": datetime.now().isoformat(),
-        "version": "1.0.0"
-    }
+    return {**_HEALTH_BASE, "timestamp": datetime.now()}
 
 
 @router.get("/ready")
-async def readiness_check() -> Dict:
+async def readiness_check(engine: CBREngine = Depends(get_engine)):
     """
     Readiness check - memastikan semua dependencies siap.
     
     Returns:
         Status readiness
     """
-    from ..cbr import get_cbr_engine
-    
     try:
-        engine = get_cbr_engine()
         stats = engine.get_statistics()
         
         return {
             "status": "ready",
             "database_loaded": True,
             "total_phones": stats.get("total_phones", 0),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         }
     except Exception as e:
         raise HTTPException(
@@ -55,26 +74,11 @@ async def readiness_check() -> Dict:
 
 
 @router.get("/info")
-async def app_info() -> Dict:
+async def app_info():
     """
     Informasi aplikasi.
     
     Returns:
         Info lengkap aplikasi
     """
-    from ..config import settings
-    
-    return {
-        "app_name": settings.APP_NAME,
-        "version": settings.APP_VERSION,
-        "description": "Sistem Rekomendasi Handphone berbasis Case-Based Reasoning",
-        "algorithm": "Weighted Euclidean Distance",
-        "features": [
-            "Phone recommendation based on user preferences",
-            "Customizable attribute weights",
-            "Model evaluation with multiple scenarios",
-            "Admin dashboard for weight management"
-        ],
-        "documentation": "/docs",
-        "timestamp": datetime.now().isoformat()
-    }
+    return {**_INFO_BASE, "timestamp": datetime.now()}
@@ -2,19 +2,26 @@
 API endpoints untuk rekomendasi HP
 """
 
-from fastapi import APIRouter, HTTPException, Query, Body
-from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel, Field
 from datetime import datetime
+import numpy as np
+import pandas as pd
 
-from ..cbr import get_cbr_engine
+from ..cbr import CBREngine, SimilarityBatcher
+from ..config import settings
+from ..dependencies import get_batcher, get_engine
+from ..utils.cache import cached, get_cached, set_cached
+from ..utils.responses import CBRRoute, stream_json_list
 from ..models.phone import (
     PhoneInput, 
     RecommendationRequest,
     RecommendationResponse
 )
 
-router = APIRouter(prefix="/recommendations", tags=["Recommendations"])
+router = APIRouter(prefix="/recommendations", tags=["Recommendations"], route_class=CBRRoute)
 
 
 class QuickRecommendRequest(BaseModel):
@@ -28,8 +35,86 @@ class QuickRecommendRequest(BaseModel):
     top_k: int = Field(10, ge=1, le=50, description="Jumlah rekomendasi")
     
 
-@router.post("/", response_model=Dict)
-async def get_recommendations(request: RecommendationRequest) -> Dict:
+def _filter_and_paginate(
+    case_base: pd.DataFrame,
+    page: int,
+    limit: int,
+    brand: Optional[str],
+    min_price: Optional[int],
+    max_price: Optional[int],
+    min_ram: Optional[int],
+    sort_by: Optional[str],
+    sort_order: Optional[str]
+) -> Tuple[int, List[Dict]]:
+    """
+    Filter, sorting, dan pagination daftar HP.
+    
+    Args:
+        case_base: DataFrame case base
+        page: Nomor halaman
+        limit: Jumlah per halaman
+        brand: Filter brand
+        min_price: Harga minimum
+        max_price: Harga maksimum
+        min_ram: RAM minimum
+        sort_by: Kolom untuk sorting
+        sort_order: asc atau desc
+        
+    Returns:
+        Tuple (total hasil filter, list HP pada halaman ini)
+    """
+    # Apply filters (satu mask gabungan, tanpa copy per filter)
+    conditions = []
+    if brand:
+        # Bandingkan di level kategori, lalu cocokkan kode integer per baris
+        brands = case_base['Brand'].cat
+        matched = np.flatnonzero(brands.categories.str.lower() == brand.lower())
+        conditions.append(np.isin(brands.codes.to_numpy(), matched))
+    if min_price:
+        conditions.append(case_base['Harga'].to_numpy() >= min_price)
+    if max_price:
+        conditions.append(case_base['Harga'].to_numpy() <= max_price)
+    if min_ram:
+        conditions.append(case_base['Ram'].to_numpy() >= min_ram)
+    
+    # Tanpa filter, langsung pakai case base (tidak di-copy)
+    df = case_base.loc[np.logical_and.reduce(conditions)] if conditions else case_base
+    
+    # Pagination
+    total = len(df)
+    start = (page - 1) * limit
+    end = start + limit
+    
+    if sort_by not in df.columns or start >= total:
+        return total, df.iloc[start:end].to_dict('records')
+    
+    ascending = sort_order.lower() == 'asc'
+    values = df[sort_by]
+    
+    # Kolom non-numerik / berisi NaN: sorting penuh
+    if not pd.api.types.is_numeric_dtype(values) or values.isna().any() or end >= total:
+        df = df.sort_values(by=sort_by, ascending=ascending, kind='stable')
+        return total, df.iloc[start:end].to_dict('records')
+    
+    # Partial sort: ambil `end` baris teratas dengan partition O(N),
+    # lalu sort stabil hanya kandidat tersebut (nilai seri di batas ikut)
+    keys = values.to_numpy(dtype=np.float64)
+    if not ascending:
+        keys = -keys
+    
+    kth = np.partition(keys, end - 1)[end - 1]
+    candidates = np.flatnonzero(keys <= kth)
+    order = candidates[np.argsort(keys[candidates], kind='stable')][start:end]
+    
+    return total, df.iloc[order].to_dict('records')
+
+
+@router.post("/")
+async def get_recommendations(
+    request: RecommendationRequest,
+    engine: CBREngine = Depends(get_engine),
+    batcher: SimilarityBatcher = Depends(get_batcher)
+):
     """
     Mendapatkan rekomendasi HP berdasarkan preferensi user.
     
@@ -46,34 +131,35 @@ async def get_recommendations(request: RecommendationRequest) -> Dict:
     - Penjelasan mengapa HP tersebut direkomendasikan
     """
     try:
-        engine = get_cbr_engine()
-        
         # Convert PhoneInput to dict
-        user_input = {
-            'min_harga': request.input_specs.min_harga,
-            'max_harga': request.input_specs.max_harga,
-            'ram': request.input_specs.ram,
-            'memori_internal': request.input_specs.memori_internal,
-            'min_baterai': request.input_specs.min_baterai,
-            'resolusi_kamera': request.input_specs.resolusi_kamera,
-            'ukuran_layar': request.input_specs.ukuran_layar,
-            'min_rating': request.input_specs.min_rating,
-            'preferred_brands': request.input_specs.preferred_brands,
-            'preferred_os': request.input_specs.preferred_os
-        }
+        user_input = request.input_specs.model_dump(exclude={'custom_weights'})
+        
+        # Custom weights hanya berlaku untuk request ini (bobot engine tidak diubah)
+        weights = request.input_specs.custom_weights or None
+        key_weights = dict(weights or engine.get_weights())
+        
+        # Return cached response jika ada (key sudah memuat bobot yang dipakai)
+        cached_response = await get_cached("get_recommendations", request, key_weights)
+        if cached_response is not None:
+            return cached_response
         
-        # Apply custom weights if provided
-        if request.input_specs.custom_weights:
-            engine.set_weights(request.input_specs.custom_weights)
+        # Similarity dihitung bersama request lain dalam satu batch
+        similarities, version = await batcher.submit(*engine.similarity_inputs(user_input, weights))
         
-        # Get recommendations
-        result = engine.recommend(
+        # Get recommendations (komputasi CBR di threadpool)
+        result = await run_in_threadpool(
+            engine.recommend,
             user_input=user_input,
             top_k=request.top_k,
-            min_similarity=request.min_similarity
+            min_similarity=request.min_similarity,
+            weights=weights,
+            similarities=similarities,
+            similarities_version=version
         )
         
-        return result
+        return await set_cached(
+            "get_recommendations", request, key_weights, result, settings.CACHE_TTL
+        )
         
     except Exception as e:
         import traceback
@@ -84,16 +170,19 @@ async def get_recommendations(request: RecommendationRequest) -> Dict:
         )
 
 
-@router.post("/quick", response_model=Dict)
-async def quick_recommendation(request: QuickRecommendRequest) -> Dict:
+@router.post("/quick")
+@cached()
+async def quick_recommendation(
+    request: QuickRecommendRequest,
+    engine: CBREngine = Depends(get_engine),
+    batcher: SimilarityBatcher = Depends(get_batcher)
+):
     """
     Rekomendasi cepat dengan parameter minimal.
     
     Endpoint ini lebih sederhana untuk penggunaan langsung.
     """
     try:
-        engine = get_cbr_engine()
-        
         user_input = {
             'max_harga': request.max_harga,
             'ram': request.ram,
@@ -103,10 +192,15 @@ async def quick_recommendation(request: QuickRecommendRequest) -> Dict:
             'preferred_os': request.preferred_os
         }
         
-        result = engine.recommend(
+        similarities, version = await batcher.submit(*engine.similarity_inputs(user_input))
+        
+        result = await run_in_threadpool(
+            engine.recommend,
             user_input=user_input,
             top_k=request.top_k,
-            min_similarity=0.2
+            min_similarity=0.2,
+            similarities=similarities,
+            similarities_version=version
         )
         
         return result
@@ -118,7 +212,8 @@ async def quick_recommendation(request: QuickRecommendRequest) -> Dict:
         )
 
 
-@router.get("/phones", response_model=Dict)
+@router.get("/phones")
+@cached()
 async def list_all_phones(
     page: int = Query(1, ge=1, description="Nomor halaman"),
     limit: int = Query(20, ge=1, le=100, description="Jumlah per halaman"),
@@ -127,45 +222,32 @@ async def list_all_phones(
     max_price: Optional[int] = Query(None, description="Harga maksimum"),
     min_ram: Optional[int] = Query(None, description="RAM minimum"),
     sort_by: Optional[str] = Query("Harga", description="Kolom untuk sorting"),
-    sort_order: Optional[str] = Query("asc", description="asc atau desc")
-) -> Dict:
+    sort_order: Optional[str] = Query("asc", description="asc atau desc"),
+    engine: CBREngine = Depends(get_engine)
+):
     """
     Mendapatkan daftar semua HP dengan filter dan pagination.
     """
     try:
-        engine = get_cbr_engine()
-        df = engine.case_base.copy()
-        
-        # Apply filters
-        if brand:
-            df = df[df['Brand'].str.lower() == brand.lower()]
-        if min_price:
-            df = df[df['Harga'] >= min_price]
-        if max_price:
-            df = df[df['Harga'] <= max_price]
-        if min_ram:
-            df = df[df['Ram'] >= min_ram]
-        
-        # Sorting
-        if sort_by in df.columns:
-            ascending = sort_order.lower() == 'asc'
-            df = df.sort_values(by=sort_by, ascending=ascending)
-        
-        # Pagination
-        total = len(df)
-        start = (page - 1) * limit
-        end = start + limit
-        
-        phones = df.iloc[start:end].to_dict('records')
+        # Filter, sorting, dan pagination (pandas) dijalankan di threadpool
+        total, phones = await run_in_threadpool(
+            _filter_and_paginate,
+            engine.case_base, page, limit, brand,
+            min_price, max_price, min_ram, sort_by, sort_order
+        )
         
-        return {
-            "success": True,
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "total_pages": (total + limit - 1) // limit,
-            "phones": phones
-        }
+        # Stream per baris dengan orjson
+        return stream_json_list(
+            {
+                "success": True,
+                "page": page,
+                "limit": limit,
+                "total": total,
+                "total_pages": (total + limit - 1) // limit
+            },
+            "phones",
+            phones
+        )
         
     except Exception as e:
         raise HTTPException(
@@ -174,24 +256,24 @@ async def list_all_phones(
         )
 
 
-@router.get("/phones/{phone_id}", response_model=Dict)
-async def get_phone_detail(phone_id: int) -> Dict:
+@router.get("/phones/{phone_id}")
+@cached()
+async def get_phone_detail(
+    phone_id: int,
+    engine: CBREngine = Depends(get_engine)
+):
     """
     Mendapatkan detail satu HP berdasarkan ID.
     """
     try:
-        engine = get_cbr_engine()
-        
-        phone = engine.case_base[engine.case_base['Id_hp'] == phone_id]
+        phone_data = engine.get_case(phone_id)
         
-        if phone.empty:
+        if phone_data is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Phone with ID {phone_id} not found"
             )
         
-        phone_data = phone.iloc[0].to_dict()
-        
         # Get similar phones
         query = {
             'harga': phone_data.get('Harga'),
@@ -199,15 +281,16 @@ async def get_phone_detail(phone_id: int) -> Dict:
             'memori_internal': phone_data.get('Memori_internal')
         }
         
-        similar = engine.retrieve(query, top_k=5, min_similarity=0.5)
+        similar = await run_in_threadpool(
+            engine.retrieve, query, top_k=4, min_similarity=0.5, exclude_ids=[phone_id]
+        )
         similar_phones = [
             {
                 'phone': case,
                 'similarity': round(sim * 100, 2)
             }
             for idx, case, sim in similar
-            if case.get('Id_hp') != phone_id
-        ][:4]
+        ]
         
         return {
             "success": True,
@@ -224,13 +307,13 @@ async def get_phone_detail(phone_id: int) -> Dict:
         )
 
 
-@router.get("/statistics", response_model=Dict)
-async def get_statistics() -> Dict:
+@router.get("/statistics")
+@cached()
+async def get_statistics(engine: CBREngine = Depends(get_engine)):
     """
     Mendapatkan statistik dataset.
     """
     try:
-        engine = get_cbr_engine()
         stats = engine.get_statistics()
         
         return {
@@ -245,20 +328,18 @@ async def get_statistics() -> Dict:
         )
 
 
-@router.get("/brands", response_model=Dict)
-async def get_brands() -> Dict:
+@router.get("/brands")
+@cached()
+async def get_brands(engine: CBREngine = Depends(get_engine)):
     """
     Mendapatkan daftar brand yang tersedia.
     """
     try:
-        engine = get_cbr_engine()
-        brands = engine.case_base['Brand'].unique().tolist()
-        
-        brand_counts = engine.case_base['Brand'].value_counts().to_dict()
+        brands, brand_counts = engine.get_brands()
         
         return {
             "success": True,
-            "brands": sorted(brands),
+            "brands": brands,
             "brand_counts": brand_counts
         }
         
@@ -269,20 +350,16 @@ async def get_brands() -> Dict:
         )
 
 
-@router.get("/price-ranges", response_model=Dict)
-async def get_price_ranges() -> Dict:
+@router.get("/price-ranges")
+@cached()
+async def get_price_ranges(engine: CBREngine = Depends(get_engine)):
     """
     Mendapatkan range harga untuk filter.
     """
     try:
-        engine = get_cbr_engine()
-        prices = engine.case_base['Harga']
-        
         return {
             "success": True,
-            "min_price": int(prices.min()),
-            "max_price": int(prices.max()),
-            "avg_price": int(prices.mean()),
+            **engine.get_price_range(),
             "ranges": [
                 {"label": "< 2 Juta", "min": 0, "max": 2000000},
                 {"label": "2 - 5 Juta", "min": 2000000, "max": 5000000},
@@ -1,5 +1,6 @@
 # Utils Package
 from .data_loader import DataLoader
 from .preprocessing import DataPreprocessor
+from .responses import CBRJSONResponse, stream_json_list
 
-__all__ = ["DataLoader", "DataPreprocessor"]
+__all__ = ["DataLoader", "DataPreprocessor", "CBRJSONResponse", "stream_json_list"]
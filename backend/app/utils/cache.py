@@ -0,0 +1,241 @@
+"""
+Cache response berbasis Redis untuk endpoint rekomendasi
+Cache hanya aktif jika paket redis terpasang dan REDIS_URL diset.
+"""
+
+import functools
+import hashlib
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+import orjson
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+
+from .responses import CBRJSONResponse
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:  # pragma: no cover - redis opsional
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Prefix namespace semua key cache rekomendasi
+CACHE_PREFIX = "reco"
+
+_redis: Optional["aioredis.Redis"] = None
+
+
+async def init_cache() -> None:
+    """
+    Membuat client Redis dengan satu connection pool bersama.
+    Dipanggil saat startup aplikasi.
+    """
+    global _redis
+    
+    from ..config import settings
+    
+    if not settings.REDIS_URL:
+        logger.info("REDIS_URL tidak diset, response cache dinonaktifkan")
+        return
+    
+    if not REDIS_AVAILABLE:
+        logger.warning("Paket redis tidak terpasang, response cache dinonaktifkan")
+        return
+    
+    pool = aioredis.ConnectionPool.from_url(settings.REDIS_URL, max_connections=20)
+    _redis = aioredis.Redis(connection_pool=pool)
+    logger.info("Response cache Redis aktif")
+
+
+async def close_cache() -> None:
+    """Menutup client dan connection pool Redis saat shutdown."""
+    global _redis
+    
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
+def _make_key(endpoint: str, params: Any, weights: Dict[str, float]) -> str:
+    """
+    Membuat key cache dari nama endpoint, parameter request, dan bobot aktif.
+    
+    Bobot ikut dalam key karena hasil similarity bergantung padanya,
+    sehingga perubahan bobot otomatis menghasilkan key baru.
+    
+    Args:
+        endpoint: Nama endpoint
+        params: Parameter request (dict, boleh berisi model pydantic)
+        weights: Bobot aktif engine
+    
+    Returns:
+        Key cache
+    """
+    raw = orjson.dumps(
+        [params, dict(weights)],
+        default=lambda o: o.model_dump(),
+        option=orjson.OPT_SORT_KEYS
+    )
+    return f"{CACHE_PREFIX}:{endpoint}:{hashlib.sha1(raw).hexdigest()}"
+
+
+async def get_cached(endpoint: str, params: Any, weights: Dict[str, float]) -> Optional[Response]:
+    """
+    Mengambil response JSON dari cache.
+    
+    Args:
+        endpoint: Nama endpoint
+        params: Parameter request
+        weights: Bobot aktif engine
+    
+    Returns:
+        Response jika cache hit, None jika miss atau cache tidak aktif
+    """
+    if _redis is None:
+        return None
+    
+    try:
+        payload = await _redis.get(_make_key(endpoint, params, weights))
+    except Exception as e:
+        logger.warning(f"Cache GET gagal: {e}")
+        return None
+    
+    if payload is None:
+        return None
+    
+    return Response(content=payload, media_type="application/json")
+
+
+async def _store(key: str, payload: bytes, ttl: int) -> None:
+    """
+    Menulis payload ke Redis; kegagalan hanya dicatat.
+    
+    Args:
+        key: Key cache
+        payload: Bytes JSON response
+        ttl: Masa berlaku cache (detik)
+    """
+    try:
+        await _redis.setex(key, ttl, payload)
+    except Exception as e:
+        logger.warning(f"Cache SETEX gagal: {e}")
+
+
+async def _tee_to_cache(
+    key: str,
+    ttl: int,
+    body_iterator: AsyncIterator[bytes]
+) -> AsyncIterator[bytes]:
+    """
+    Meneruskan chunk stream ke client sambil mengumpulkannya untuk cache.
+    
+    Payload disimpan setelah chunk terakhir terkirim; stream yang terputus
+    di tengah tidak di-cache.
+    
+    Args:
+        key: Key cache
+        ttl: Masa berlaku cache (detik)
+        body_iterator: Iterator body StreamingResponse
+    
+    Yields:
+        Chunk body apa adanya
+    """
+    chunks = []
+    async for chunk in body_iterator:
+        chunks.append(chunk)
+        yield chunk
+    
+    await _store(key, b"".join(chunks), ttl)
+
+
+async def set_cached(
+    endpoint: str,
+    params: Any,
+    weights: Dict[str, float],
+    content: Any,
+    ttl: int
+) -> Any:
+    """
+    Menyimpan response ke cache.
+    
+    Args:
+        endpoint: Nama endpoint
+        params: Parameter request
+        weights: Bobot aktif engine
+        content: Isi response (dict, Response, atau StreamingResponse)
+        ttl: Masa berlaku cache (detik)
+    
+    Returns:
+        Response JSON yang sudah diserialisasi, StreamingResponse yang sama
+        (disimpan ke cache setelah stream selesai), atau content apa adanya
+        jika cache tidak aktif
+    """
+    if _redis is None:
+        return content
+    
+    key = _make_key(endpoint, params, weights)
+    
+    if isinstance(content, StreamingResponse):
+        # Tetap di-stream; body tidak dikumpulkan dulu di jalur request
+        content.body_iterator = _tee_to_cache(key, ttl, content.body_iterator)
+        return content
+    
+    if isinstance(content, Response):
+        payload = content.body
+    else:
+        payload = orjson.dumps(content, option=CBRJSONResponse.OPTIONS)
+    
+    await _store(key, payload, ttl)
+    
+    return Response(content=payload, media_type="application/json")
+
+
+async def invalidate_cache() -> None:
+    """Menghapus seluruh key di namespace cache rekomendasi."""
+    if _redis is None:
+        return
+    
+    try:
+        keys = [key async for key in _redis.scan_iter(match=f"{CACHE_PREFIX}:*")]
+        if keys:
+            await _redis.unlink(*keys)
+    except Exception as e:
+        logger.warning(f"Cache invalidation gagal: {e}")
+
+
+def cached(ttl: int = None) -> Callable:
+    """
+    Decorator cache untuk endpoint read-only.
+    
+    Key dibentuk dari nama endpoint, seluruh argumen endpoint kecuali
+    dependency engine/batcher, dan bobot aktif engine. HTTPException tidak di-cache.
+    
+    Args:
+        ttl: Masa berlaku cache (detik), default settings.CACHE_TTL
+    
+    Returns:
+        Decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            from ..config import settings
+            
+            params = {k: v for k, v in kwargs.items() if k not in ('engine', 'batcher')}
+            weights = kwargs['engine'].get_weights()
+            
+            response = await get_cached(func.__name__, params, weights)
+            if response is not None:
+                return response
+            
+            result = await func(**kwargs)
+            return await set_cached(
+                func.__name__, params, weights, result, ttl or settings.CACHE_TTL
+            )
+        
+        return wrapper
+    
+    return decorator
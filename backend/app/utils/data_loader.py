@@ -1,9 +1,15 @@
 """
 Loader untuk dataset HP dari file Excel
+Case base disimpan di SQLite; file Excel hanya sumber awal dan format export.
 """
 
 import pandas as pd
 import numpy as np
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
 from typing import Optional, List, Dict, Tuple
 import logging
@@ -14,7 +20,7 @@ logger = logging.getLogger(__name__)
 
 
 class DataLoader:
-    """Loader untuk dataset HP dari Excel dengan validasi."""
+    """Loader untuk dataset HP (SQLite, diisi dari Excel/Parquet/CSV) dengan validasi."""
     
     # Kolom yang diharapkan dalam dataset
     REQUIRED_COLUMNS = [
@@ -26,24 +32,54 @@ class DataLoader:
     # Kolom opsional
     OPTIONAL_COLUMNS = ['Tahun_rilis', 'Stok_tersedia']
     
-    def __init__(self, file_path: str):
+    # Kolom turunan (diisi scripts/prepare_data.py), tidak wajib saat add_new_case
+    DERIVED_COLUMNS = ['Label']
+    
+    # Kolom string berkardinalitas rendah, disimpan sebagai Categorical
+    CATEGORY_COLUMNS = ['Brand', 'Os']
+    
+    # Kolom integer yang di-downcast ke tipe terkecil yang muat (int8/16/32)
+    DOWNCAST_COLUMNS = ['Harga', 'Ram', 'Memori_internal', 'Kapasitas_baterai']
+    
+    # Nama tabel SQLite untuk case base
+    TABLE_NAME = 'phones'
+    
+    # Tabel key-value berisi identitas file sumber saat database dibuat
+    META_TABLE = 'metadata'
+    
+    # Format teks datetime hasil to_sql (kolom object berisi datetime)
+    SQLITE_DATETIME = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$')
+    
+    def __init__(self, file_path: str, db_path: str = None):
         """
         Inisialisasi DataLoader.
         
         Args:
             file_path: Path ke file Excel dataset
+            db_path: Path ke database SQLite (default: phones.db di folder dataset)
         """
         self.file_path = Path(file_path)
+        self.db_path = Path(db_path) if db_path else self.file_path.with_name('phones.db')
         self.df: Optional[pd.DataFrame] = None
         self.is_loaded = False
         self._validation_errors: List[str] = []
         
-    def load(self, validate: bool = True) -> pd.DataFrame:
+    def _connect(self) -> sqlite3.Connection:
+        """Membuka koneksi baru ke database SQLite."""
+        return sqlite3.connect(self.db_path)
+    
+    def load(self, validate: bool = True, reseed: bool = False) -> pd.DataFrame:
         """
-        Memuat dataset dari file Excel.
+        Memuat dataset dari database SQLite.
+        
+        Database adalah sumber kebenaran (berisi tambahan/hapusan admin).
+        File sumber hanya dipakai untuk seed saat database belum ada, atau
+        jika reseed=True (lihat scripts/reseed_database.py).
         
         Args:
             validate: Apakah perlu validasi setelah load
+            reseed: Ganti isi database dengan isi file sumber
+                    (perubahan dari admin hilang)
             
         Returns:
             DataFrame berisi data handphone
@@ -52,14 +88,22 @@ class DataLoader:
             FileNotFoundError: Jika file tidak ditemukan
             ValueError: Jika struktur data tidak valid
         """
-        if not self.file_path.exists():
+        seed = reseed or not self.db_path.exists()
+        if seed and not self.file_path.exists():
             raise FileNotFoundError(f"Dataset tidak ditemukan: {self.file_path}")
         
-        logger.info(f"Loading dataset dari {self.file_path}")
-        
         try:
-            # Load Excel file
-            self.df = pd.read_excel(self.file_path, engine='openpyxl')
+            if seed:
+                logger.info(f"Loading dataset dari {self.file_path}")
+                self.df = self._read_source()
+                self._init_database()
+            else:
+                self._warn_if_source_changed()
+                logger.info(f"Loading dataset dari {self.db_path}")
+                self.df = self._read_database()
+            
+            self._optimize_dtypes()
+            
             logger.info(f"Berhasil memuat {len(self.df)} baris data")
             
             if validate:
@@ -72,6 +116,146 @@ class DataLoader:
             logger.error(f"Error loading dataset: {e}")
             raise
     
+    def _read_source(self) -> pd.DataFrame:
+        """
+        Membaca file dataset sumber sesuai ekstensinya.
+        
+        Parquet/CSV dibaca langsung tanpa parsing XML;
+        Excel tetap didukung sebagai format default, dibaca dengan
+        python-calamine (parser Rust) jika terpasang, fallback openpyxl.
+        Parquet dibaca dengan memory-map sehingga proses lain yang membaca
+        file yang sama berbagi page cache OS (lihat scripts/convert_xlsx.py).
+        
+        Returns:
+            DataFrame berisi data handphone
+        """
+        suffix = self.file_path.suffix.lower()
+        
+        if suffix == '.parquet':
+            import pyarrow.parquet as pq
+            
+            table = pq.read_table(self.file_path, memory_map=True)
+            return self._restore_datetimes(table.to_pandas(self_destruct=True))
+        if suffix == '.csv':
+            return self._restore_datetimes(pd.read_csv(self.file_path))
+        
+        return read_excel(self.file_path)
+    
+    def _read_database(self) -> pd.DataFrame:
+        """
+        Membaca seluruh tabel case base dari SQLite.
+        
+        Returns:
+            DataFrame dengan nilai sama seperti hasil baca file Excel
+        """
+        with closing(self._connect()) as conn:
+            df = pd.read_sql(f'SELECT * FROM {self.TABLE_NAME} ORDER BY rowid', conn)
+        
+        # SQLite menyimpan boolean sebagai 0/1
+        if 'Stok_tersedia' in df.columns:
+            df['Stok_tersedia'] = df['Stok_tersedia'].fillna(1).astype(bool)
+        
+        return self._restore_datetimes(df)
+    
+    def _restore_datetimes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Kembalikan teks datetime (hasil simpan SQLite/Parquet) menjadi datetime.
+        
+        Kolom object campuran dari Excel (contoh: Tahun_rilis) berisi datetime
+        dan string; saat disimpan datetime menjadi teks "YYYY-MM-DD HH:MM:SS".
+        Tanpa ini response API berbeda antara boot pertama dan berikutnya.
+        
+        Args:
+            df: DataFrame hasil baca database / Parquet / CSV
+            
+        Returns:
+            DataFrame yang sama dengan nilai datetime dipulihkan
+        """
+        for col in df.select_dtypes(include='object').columns:
+            values = df[col].to_numpy(dtype=object, copy=True)
+            is_datetime = np.fromiter(
+                (isinstance(v, str) and self.SQLITE_DATETIME.match(v) is not None for v in values),
+                dtype=bool, count=len(values)
+            )
+            if is_datetime.any():
+                values[is_datetime] = [
+                    datetime.strptime(v, '%Y-%m-%d %H:%M:%S') for v in values[is_datetime]
+                ]
+                # dtype object eksplisit: tanpa ini pandas mengubahnya ke Timestamp
+                df[col] = pd.Series(values, index=df.index, dtype=object)
+        
+        return df
+    
+    def _source_signature(self) -> Dict[str, str]:
+        """
+        Identitas file sumber saat seed, untuk mendeteksi dataset yang berubah.
+        
+        Returns:
+            Dictionary path absolut, mtime (ns), dan ukuran file
+        """
+        stat = self.file_path.stat()
+        return {
+            "source_path": str(self.file_path.resolve()),
+            "source_mtime_ns": str(stat.st_mtime_ns),
+            "source_size": str(stat.st_size)
+        }
+    
+    def _warn_if_source_changed(self) -> None:
+        """
+        Beri peringatan jika file sumber berbeda dari saat database di-seed.
+        
+        Database tidak pernah diganti otomatis (tambahan/hapusan admin hanya
+        ada di database); seed ulang harus diminta eksplisit dengan reseed.
+        """
+        if not self.file_path.exists():
+            return
+        
+        with closing(self._connect()) as conn:
+            try:
+                stored = dict(conn.execute(f'SELECT key, value FROM {self.META_TABLE}').fetchall())
+            except sqlite3.OperationalError:
+                stored = {}
+        
+        if stored != self._source_signature():
+            logger.warning(
+                f"File sumber {self.file_path} berubah sejak {self.db_path} di-seed; "
+                "database tetap dipakai. Jalankan scripts/reseed_database.py "
+                "untuk seed ulang dari file sumber."
+            )
+    
+    def _optimize_dtypes(self) -> None:
+        """
+        Persempit tipe data kolom setelah load.
+        
+        Brand/Os menjadi Categorical (perbandingan via kode integer) dan
+        kolom spesifikasi integer di-downcast agar scan kolom lebih ringan.
+        """
+        for col in self.CATEGORY_COLUMNS:
+            if col in self.df.columns:
+                self.df[col] = self.df[col].astype('category')
+        
+        for col in self.DOWNCAST_COLUMNS:
+            if col in self.df.columns and pd.api.types.is_integer_dtype(self.df[col]):
+                self.df[col] = pd.to_numeric(self.df[col], downcast='integer')
+    
+    def _init_database(self) -> None:
+        """
+        Seed tabel SQLite dari DataFrame hasil load file sumber (tabel lama
+        diganti) dan mencatat identitas file sumber di tabel metadata.
+        """
+        with closing(self._connect()) as conn, conn:
+            self.df.to_sql(self.TABLE_NAME, conn, index=False, if_exists='replace')
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.META_TABLE} (key TEXT PRIMARY KEY, value TEXT)'
+            )
+            conn.execute(f'DELETE FROM {self.META_TABLE}')
+            conn.executemany(
+                f'INSERT INTO {self.META_TABLE} (key, value) VALUES (?, ?)',
+                self._source_signature().items()
+            )
+        
+        logger.info(f"Database dibuat: {self.db_path}")
+    
     def _validate_dataset(self) -> bool:
         """
         Validasi struktur dan isi dataset.
@@ -128,12 +312,15 @@ class DataLoader:
         if not self.is_loaded:
             raise ValueError("Dataset belum dimuat. Panggil load() terlebih dahulu.")
         
+        # Satu kali scan kolom Brand untuk jumlah dan daftar brand
+        brand_list = self.df['Brand'].unique().tolist() if 'Brand' in self.df.columns else []
+        
         stats = {
             "total_phones": len(self.df),
             "total_columns": len(self.df.columns),
             "columns": list(self.df.columns),
-            "brands": self.df['Brand'].nunique() if 'Brand' in self.df.columns else 0,
-            "brand_list": self.df['Brand'].unique().tolist() if 'Brand' in self.df.columns else [],
+            "brands": sum(1 for brand in brand_list if pd.notna(brand)),
+            "brand_list": brand_list,
             "price_range": {
                 "min": int(self.df['Harga'].min()) if 'Harga' in self.df.columns else 0,
                 "max": int(self.df['Harga'].max()) if 'Harga' in self.df.columns else 0,
@@ -178,54 +365,112 @@ class DataLoader:
         if not self.is_loaded:
             self.load()
         
-        filtered_df = self.df.copy()
+        # Gabungkan semua kondisi dalam satu mask, index sekali di akhir
+        mask = np.ones(len(self.df), dtype=bool)
         
         for column, value in criteria.items():
-            if column not in filtered_df.columns:
+            if column not in self.df.columns:
                 continue
-                
+            
+            values = self.df[column].to_numpy()
+            
             if isinstance(value, dict):
                 # Handle range filter
                 if 'min' in value:
-                    filtered_df = filtered_df[filtered_df[column] >= value['min']]
+                    mask &= values >= value['min']
                 if 'max' in value:
-                    filtered_df = filtered_df[filtered_df[column] <= value['max']]
+                    mask &= values <= value['max']
             elif isinstance(value, list):
                 # Handle multiple values
-                filtered_df = filtered_df[filtered_df[column].isin(value)]
+                mask &= np.isin(values, value)
             else:
                 # Exact match
-                filtered_df = filtered_df[filtered_df[column] == value]
+                mask &= values == value
         
-        return filtered_df
+        return self.df.loc[mask]
     
     def add_new_case(self, phone_data: Dict) -> bool:
         """
         Menambahkan kasus baru ke dataset (RETAIN phase).
         
+        Hanya menulis baris baru ke SQLite (state yang tersimpan); self.df
+        tidak disalin ulang, snapshot berikutnya dibangun oleh CBREngine.retain.
+        
         Args:
             phone_data: Dictionary berisi data HP baru
             
         Returns:
             True jika berhasil
+            
+        Raises:
+            ValueError: Jika key phone_data tidak ada di tabel, atau kolom
+                        tabel yang wajib (selain Id_hp) tidak diisi
         """
         if not self.is_loaded:
             self.load()
         
-        # Generate new ID
-        new_id = self.df['Id_hp'].max() + 1
-        phone_data['Id_hp'] = new_id
-        
-        # Add to DataFrame
-        new_row = pd.DataFrame([phone_data])
-        self.df = pd.concat([self.df, new_row], ignore_index=True)
+        # Validasi terhadap kolom tabel (Id_hp dibuat di sini)
+        unknown = [c for c in phone_data if c not in self.df.columns]
+        optional = {'Id_hp', *self.OPTIONAL_COLUMNS, *self.DERIVED_COLUMNS}
+        missing = [c for c in self.df.columns if c not in phone_data and c not in optional]
+        if unknown or missing:
+            raise ValueError(
+                f"Data HP tidak sesuai kolom tabel {self.TABLE_NAME}: "
+                f"kolom tidak dikenal {unknown}, kolom tidak diisi {missing}"
+            )
         
-        # Save to Excel
-        self.df.to_excel(self.file_path, index=False, engine='openpyxl')
+        # Append satu baris ke SQLite (tanpa menulis ulang seluruh dataset);
+        # ID baru diambil dari tabel dalam transaksi yang sama
+        columns = ['Id_hp'] + [c for c in self.df.columns if c in phone_data and c != 'Id_hp']
+        placeholders = ", ".join("?" * len(columns))
+        with closing(self._connect()) as conn, conn:
+            (max_id,) = conn.execute(f'SELECT MAX(Id_hp) FROM {self.TABLE_NAME}').fetchone()
+            new_id = int(max_id or 0) + 1
+            phone_data['Id_hp'] = new_id
+            conn.execute(
+                f'INSERT INTO {self.TABLE_NAME} ({", ".join(columns)}) VALUES ({placeholders})',
+                [phone_data[c] for c in columns]
+            )
         
         logger.info(f"Case baru ditambahkan dengan ID: {new_id}")
         return True
     
+    def delete_case(self, phone_id: int) -> bool:
+        """
+        Menghapus kasus dari dataset berdasarkan ID.
+        
+        Args:
+            phone_id: ID HP yang akan dihapus
+            
+        Returns:
+            True jika ada baris yang dihapus
+        """
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                f'DELETE FROM {self.TABLE_NAME} WHERE Id_hp = ?', (int(phone_id),)
+            )
+        
+        if self.df is not None:
+            self.df = self.df[self.df['Id_hp'] != phone_id].reset_index(drop=True)
+        
+        logger.info(f"Case dengan ID {phone_id} dihapus")
+        return cursor.rowcount > 0
+    
+    def export_excel(self) -> BytesIO:
+        """
+        Export isi database ke file Excel (in-memory).
+        
+        Returns:
+            Buffer berisi file .xlsx
+        """
+        df = self._read_database()
+        
+        buffer = BytesIO()
+        df.to_excel(buffer, index=False, engine='openpyxl')
+        buffer.seek(0)
+        
+        return buffer
+    
     def to_dict_list(self) -> List[Dict]:
         """
         Convert DataFrame ke list of dictionaries.
@@ -256,20 +501,124 @@ class DataLoader:
         if not self.is_loaded:
             self.load()
         
-        # Shuffle data
-        shuffled_df = self.df.sample(frac=1, random_state=random_state).reset_index(drop=True)
+        # Satu permutasi indeks (tanpa salinan DataFrame teracak);
+        # RandomState menghasilkan urutan yang sama dengan df.sample(frac=1)
+        perm = np.random.RandomState(random_state).permutation(len(self.df))
         
         # Calculate split point
-        split_idx = int(len(shuffled_df) * train_ratio)
+        split_idx = int(len(self.df) * train_ratio)
         
-        train_df = shuffled_df[:split_idx]
-        test_df = shuffled_df[split_idx:]
+        train_df = self.df.iloc[perm[:split_idx]]
+        test_df = self.df.iloc[perm[split_idx:]]
         
         logger.info(f"Data split: Training={len(train_df)}, Testing={len(test_df)}")
         
         return train_df, test_df
 
 
+@lru_cache(maxsize=None)
+def excel_engine() -> str:
+    """
+    Engine Excel untuk read_excel, dideteksi sekali saat pertama dipakai.
+    
+    Returns:
+        'calamine' jika python-calamine terpasang, selain itu 'openpyxl'
+    """
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:  # pragma: no cover - python-calamine opsional
+        return 'openpyxl'
+    return 'calamine'
+
+
+def read_excel(path: Path) -> pd.DataFrame:
+    """
+    Membaca file Excel dengan excel_engine() (calamine jika terpasang).
+    
+    Args:
+        path: Path file Excel
+    
+    Returns:
+        DataFrame dengan nilai sama seperti hasil baca openpyxl
+    """
+    engine = excel_engine()
+    
+    if engine != 'calamine':
+        return pd.read_excel(path, engine=engine)
+    
+    # pandas yang dipin (< 2.2) belum mengenal engine='calamine'; reader-nya
+    # dipakai langsung tanpa didaftarkan ke pandas (pandas tidak dimutasi)
+    from python_calamine.pandas import CalamineExcelReader
+    
+    with closing(CalamineExcelReader(path)) as reader:
+        df = reader.parse()
+    
+    # calamine mengembalikan pd.Timestamp di kolom object campuran (Tahun_rilis);
+    # samakan dengan openpyxl (datetime) agar bisa disimpan ke SQLite
+    for col in df.select_dtypes(include='object').columns:
+        df[col] = df[col].map(
+            lambda v: v.to_pydatetime() if isinstance(v, pd.Timestamp) else v
+        )
+    
+    return df
+
+
+def to_arrow_compatible(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Menyeragamkan kolom object bertipe campuran menjadi string.
+    
+    Excel dapat menghasilkan kolom berisi datetime dan string sekaligus
+    (contoh: Tahun_rilis) yang tidak bisa ditulis ke Parquet. Nilai
+    diubah dengan str() - format yang sama dengan hasil simpan ke SQLite.
+    
+    Args:
+        df: DataFrame hasil baca Excel
+    
+    Returns:
+        DataFrame yang siap ditulis ke Parquet
+    """
+    df = df.copy()
+    
+    for col in df.select_dtypes(include='object').columns:
+        values = df[col].dropna()
+        if not values.map(lambda v: isinstance(v, str)).all():
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    
+    return df
+
+
+def processed_path(processed_dir: Path, name: str) -> Path:
+    """
+    Path file data hasil prepare_data; Parquet diutamakan, fallback ke CSV.
+    
+    Args:
+        processed_dir: Folder data/processed
+        name: Nama file tanpa ekstensi (contoh: "train_70-30")
+    
+    Returns:
+        Path file .parquet jika ada, selain itu path .csv
+    """
+    parquet_path = processed_dir / f"{name}.parquet"
+    if parquet_path.exists():
+        return parquet_path
+    return processed_dir / f"{name}.csv"
+
+
+def read_processed(path: Path) -> pd.DataFrame:
+    """
+    Membaca file data hasil prepare_data (Parquet atau CSV).
+    
+    Args:
+        path: Path file dari processed_path
+    
+    Returns:
+        DataFrame
+    """
+    if Path(path).suffix.lower() == '.parquet':
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
 # Singleton instance untuk reuse
 _data_loader_instance: Optional[DataLoader] = None
 
@@ -286,9 +635,9 @@ def get_data_loader(file_path: str = None) -> DataLoader:
     global _data_loader_instance
     
     if _data_loader_instance is None:
+        from ..config import settings
         if file_path is None:
-            from ..config import settings
             file_path = settings.DATASET_PATH
-        _data_loader_instance = DataLoader(file_path)
+        _data_loader_instance = DataLoader(file_path, db_path=settings.DATABASE_PATH)
     
     return _data_loader_instance
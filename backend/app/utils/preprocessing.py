@@ -4,8 +4,11 @@ Preprocessing data HP - normalisasi, missing values, dan encoding.
 
 import pandas as pd
 import numpy as np
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple
+import functools
 import logging
+import pickle
 import re
 
 logger = logging.getLogger(__name__)
@@ -34,21 +37,34 @@ class DataPreprocessor:
         "200MP": 200
     }
     
+    # Pola angka MP untuk resolusi yang tidak ada di mapping
+    CAMERA_MP_PATTERN = re.compile(r'(\d+)\s*MP', re.IGNORECASE)
+    
     # Kolom numerik yang akan dinormalisasi
     NUMERIC_COLUMNS = [
         'Harga', 'Ram', 'Memori_internal', 'Ukuran_layar',
         'Kapasitas_baterai', 'Rating_pengguna', 'Resolusi_kamera_num'
     ]
     
+    # Kolom numerik bernilai bulat kecil yang muat di int16
+    INT16_COLUMNS = ['Ram', 'Memori_internal', 'Kapasitas_baterai', 'Resolusi_kamera_num']
+    
     def __init__(self):
         """Inisialisasi preprocessor."""
         self.min_values: Dict[str, float] = {}
         self.max_values: Dict[str, float] = {}
         self.is_fitted = False
         
+        # Parameter min-max dalam bentuk vektor (diisi saat fit)
+        self._norm_cols: List[str] = []
+        self._mins = np.empty(0)
+        self._spans = np.empty(0)
+        
         # Untuk encoding
         self.brand_encoding: Dict[str, int] = {}
         self.os_encoding: Dict[str, int] = {}
+        self._brand_cat: Optional[pd.CategoricalDtype] = None
+        self._os_cat: Optional[pd.CategoricalDtype] = None
         
     def parse_camera_resolution(self, resolution: str) -> int:
         """
@@ -60,22 +76,14 @@ class DataPreprocessor:
         Returns:
             Nilai numerik dalam MP
         """
+        # String (kasus umum) langsung ke parser ter-cache tanpa pd.isna
+        if isinstance(resolution, str):
+            return _parse_camera(resolution)
+        
         if pd.isna(resolution):
             return 12  # Default fallback
         
-        resolution = str(resolution).upper().replace(" ", "")
-        
-        # Cek mapping langsung
-        if resolution in self.CAMERA_RESOLUTION_MAP:
-            return self.CAMERA_RESOLUTION_MAP[resolution]
-        
-        # Parse dengan regex
-        match = re.search(r'(\d+)\s*MP', resolution, re.IGNORECASE)
-        if match:
-            return int(match.group(1))
-        
-        # Fallback
-        return 12
+        return _parse_camera(str(resolution))
     
     def handle_missing_values(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -87,74 +95,115 @@ class DataPreprocessor:
         - String: Gunakan "Unknown"
         
         Args:
-            df: DataFrame input
+            df: DataFrame input (tidak diubah)
             
         Returns:
-            DataFrame tanpa missing values
+            DataFrame tanpa missing values (df yang sama jika tidak ada
+            yang perlu diisi)
         """
-        df = df.copy()
-        
-        # Numeric columns - use median
         numeric_cols = ['Harga', 'Ram', 'Memori_internal', 'Ukuran_layar', 
                        'Kapasitas_baterai', 'Rating_pengguna']
+        categorical_cols = ['Brand', 'Os']
+        string_cols = ['Nama_hp', 'Resolusi_kamera']
+        
+        # Hanya kolom yang punya strategi fill yang di-scan (sekali per kolom)
+        candidates = numeric_cols + categorical_cols + string_cols + ['Stok_tersedia']
+        missing_cols = {col for col in candidates if col in df.columns and df[col].isna().any()}
         
-        for col in numeric_cols:
-            if col in df.columns and df[col].isnull().any():
-                median_val = df[col].median()
-                df[col].fillna(median_val, inplace=True)
-                logger.info(f"Filled {col} missing values with median: {median_val}")
+        fill_map = {}
+        
+        # Numeric columns - use median
+        numeric_missing = [col for col in numeric_cols if col in missing_cols]
+        if numeric_missing:
+            medians = df[numeric_missing].median().to_dict()
+            fill_map.update(medians)
+            logger.info(f"Filled missing values with median: {medians}")
         
         # Categorical columns - use mode
-        categorical_cols = ['Brand', 'Os']
         for col in categorical_cols:
-            if col in df.columns and df[col].isnull().any():
-                mode_val = df[col].mode()[0] if len(df[col].mode()) > 0 else "Unknown"
-                df[col].fillna(mode_val, inplace=True)
-                logger.info(f"Filled {col} missing values with mode: {mode_val}")
+            if col in missing_cols:
+                mode = df[col].mode()
+                fill_map[col] = mode.iat[0] if len(mode) > 0 else "Unknown"
+                logger.info(f"Filled {col} missing values with mode: {fill_map[col]}")
         
         # String columns - use "Unknown"
-        string_cols = ['Nama_hp', 'Resolusi_kamera']
         for col in string_cols:
-            if col in df.columns and df[col].isnull().any():
-                df[col].fillna("Unknown", inplace=True)
+            if col in missing_cols:
+                fill_map[col] = "Unknown"
         
         # Boolean columns
-        if 'Stok_tersedia' in df.columns:
-            df['Stok_tersedia'].fillna(True, inplace=True)
+        if 'Stok_tersedia' in missing_cols:
+            fill_map['Stok_tersedia'] = True
         
-        return df
+        if not fill_map:
+            return df
+        
+        # Satu kali fillna, menghasilkan DataFrame baru (input tidak diubah)
+        return df.fillna(value=fill_map)
     
-    def add_camera_numeric(self, df: pd.DataFrame) -> pd.DataFrame:
+    def add_camera_numeric(self, df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
         """
         Tambahkan kolom numerik untuk resolusi kamera.
         
         Args:
             df: DataFrame input
+            inplace: Tambahkan kolom langsung pada df tanpa copy (hanya untuk
+                     df milik pemanggil sendiri); default False
             
         Returns:
             DataFrame dengan kolom Resolusi_kamera_num
         """
-        df = df.copy()
+        if not inplace:
+            df = df.copy()
         
         if 'Resolusi_kamera' in df.columns:
-            df['Resolusi_kamera_num'] = df['Resolusi_kamera'].apply(
-                self.parse_camera_resolution
+            # Versi kolom dari parse_camera_resolution: mapping, regex, fallback 12
+            resolution = df['Resolusi_kamera']
+            normalized = resolution.astype(str).str.upper().str.replace(" ", "", regex=False)
+            
+            mapped = normalized.map(self.CAMERA_RESOLUTION_MAP)
+            extracted = pd.to_numeric(
+                normalized.str.extract(self.CAMERA_MP_PATTERN, expand=False),
+                errors='coerce'
+            )
+            
+            df['Resolusi_kamera_num'] = (
+                mapped.fillna(extracted)
+                .where(resolution.notna())
+                .fillna(12)
+                .astype(np.int64)
             )
         
         return df
     
-    def fit(self, df: pd.DataFrame) -> 'DataPreprocessor':
+    def _clean(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Handle missing values lalu tambahkan kolom numerik kamera.
+        
+        Args:
+            df: DataFrame input
+            
+        Returns:
+            DataFrame baru yang siap di-fit / dinormalisasi
+        """
+        cleaned = self.handle_missing_values(df)
+        # Hasil fillna sudah DataFrame baru, tidak perlu di-copy lagi
+        return self.add_camera_numeric(cleaned, inplace=cleaned is not df)
+    
+    def fit(self, df: pd.DataFrame, already_cleaned: bool = False) -> 'DataPreprocessor':
         """
         Fit preprocessor ke data (hitung min/max untuk normalisasi).
         
         Args:
             df: DataFrame training
+            already_cleaned: True jika df sudah melewati handle_missing_values
+                             dan add_camera_numeric (langkah itu dilewati)
             
         Returns:
             self
         """
-        df = self.handle_missing_values(df)
-        df = self.add_camera_numeric(df)
+        if not already_cleaned:
+            df = self._clean(df)
         
         # Calculate min/max for each numeric column
         for col in self.NUMERIC_COLUMNS:
@@ -163,18 +212,79 @@ class DataPreprocessor:
                 self.max_values[col] = df[col].max()
                 logger.info(f"{col}: min={self.min_values[col]}, max={self.max_values[col]}")
         
-        # Build encodings
+        # Build encodings (kode = urutan kategori yang sudah di-sort)
         if 'Brand' in df.columns:
-            unique_brands = df['Brand'].unique()
-            self.brand_encoding = {brand: i for i, brand in enumerate(unique_brands)}
+            brands = sorted(df['Brand'].dropna().unique())
+            self.brand_encoding = {brand: i for i, brand in enumerate(brands)}
         
         if 'Os' in df.columns:
-            unique_os = df['Os'].unique()
-            self.os_encoding = {os: i for i, os in enumerate(unique_os)}
+            os_values = sorted(df['Os'].dropna().unique())
+            self.os_encoding = {os: i for i, os in enumerate(os_values)}
         
-        self.is_fitted = True
+        self._build_fitted_params()
         return self
     
+    def _build_fitted_params(self) -> None:
+        """
+        Turunkan parameter vektor min-max dan CategoricalDtype dari
+        min_values/max_values dan dictionary encoding, lalu tandai fitted.
+        """
+        self._norm_cols = [col for col in self.NUMERIC_COLUMNS if col in self.min_values]
+        self._mins = np.array([self.min_values[col] for col in self._norm_cols], dtype=np.float64)
+        spans = np.array([self.max_values[col] for col in self._norm_cols], dtype=np.float64) - self._mins
+        # Avoid division by zero (kolom konstan -> semua 0)
+        self._spans = np.where(spans == 0, 1.0, spans)
+        
+        # Kode kategori = posisi pada CategoricalDtype
+        if self.brand_encoding:
+            self._brand_cat = pd.CategoricalDtype(categories=list(self.brand_encoding))
+        if self.os_encoding:
+            self._os_cat = pd.CategoricalDtype(categories=list(self.os_encoding))
+        
+        self.is_fitted = True
+    
+    def save_fitted(self, path: Path) -> None:
+        """
+        Simpan parameter hasil fit ke file pickle.
+        
+        Args:
+            path: Path file tujuan (contoh: data/processed/preprocessor.pkl)
+        """
+        if not self.is_fitted:
+            raise ValueError("Preprocessor belum di-fit. Panggil fit() terlebih dahulu.")
+        
+        state = {
+            "min_values": self.min_values,
+            "max_values": self.max_values,
+            "brand_encoding": self.brand_encoding,
+            "os_encoding": self.os_encoding
+        }
+        with open(path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    @classmethod
+    def load_fitted(cls, path: Path) -> 'DataPreprocessor':
+        """
+        Buat preprocessor siap pakai dari file hasil save_fitted.
+        
+        Args:
+            path: Path file pickle
+            
+        Returns:
+            DataPreprocessor yang sudah fitted
+        """
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        
+        preprocessor = cls()
+        preprocessor.min_values = state["min_values"]
+        preprocessor.max_values = state["max_values"]
+        preprocessor.brand_encoding = state["brand_encoding"]
+        preprocessor.os_encoding = state["os_encoding"]
+        preprocessor._build_fitted_params()
+        
+        return preprocessor
+    
     def transform(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Transform data menggunakan parameter yang sudah di-fit.
@@ -188,23 +298,86 @@ class DataPreprocessor:
         if not self.is_fitted:
             raise ValueError("Preprocessor belum di-fit. Panggil fit() terlebih dahulu.")
         
-        df = self.handle_missing_values(df)
-        df = self.add_camera_numeric(df)
+        return self._transform_cleaned(self._clean(df))
+    
+    def _transform_cleaned(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Tambahkan kolom *_norm (min-max) ke DataFrame yang sudah dibersihkan.
         
-        # Create normalized columns
-        for col in self.NUMERIC_COLUMNS:
-            if col in df.columns and col in self.min_values:
-                min_val = self.min_values[col]
-                max_val = self.max_values[col]
-                
-                # Avoid division by zero
-                if max_val - min_val != 0:
-                    df[f'{col}_norm'] = (df[col] - min_val) / (max_val - min_val)
-                else:
-                    df[f'{col}_norm'] = 0
+        Args:
+            df: DataFrame hasil _clean (kolom integer diubah langsung)
+            
+        Returns:
+            DataFrame baru dengan kolom ternormalisasi
+        """
+        df = self._downcast_integers(df)
+        
+        # Create normalized columns (satu operasi matriks untuk semua kolom)
+        present = np.array([col in df.columns for col in self._norm_cols], dtype=bool)
+        if not present.any():
+            return df
+        
+        cols = [col for col, ok in zip(self._norm_cols, present) if ok]
+        values = df[cols].to_numpy(dtype=np.float64)
+        normalized = (values - self._mins[present]) / self._spans[present]
+        
+        # Semua kolom *_norm ditambahkan sebagai satu blok float32 (tanpa fragmentasi)
+        norm_cols = [f'{col}_norm' for col in cols]
+        norm_df = pd.DataFrame(normalized.astype(np.float32), columns=norm_cols, index=df.index)
+        existing = [col for col in norm_cols if col in df.columns]
+        if existing:
+            df = df.drop(columns=existing)
+        
+        return pd.concat([df, norm_df], axis=1, copy=False)
+    
+    def _downcast_integers(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Ubah kolom INT16_COLUMNS ke int16 jika semua nilainya bulat dan muat.
+        
+        Args:
+            df: DataFrame hasil transform
+            
+        Returns:
+            DataFrame yang sama dengan kolom int16
+        """
+        info = np.iinfo(np.int16)
+        for col in self.INT16_COLUMNS:
+            if col not in df.columns or not pd.api.types.is_numeric_dtype(df[col]):
+                continue
+            
+            values = df[col].to_numpy()
+            if (
+                np.isfinite(values).all()
+                and (values == np.round(values)).all()
+                and values.min(initial=0) >= info.min
+                and values.max(initial=0) <= info.max
+            ):
+                df[col] = values.astype(np.int16)
         
         return df
     
+    def encode_categoricals(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Tambahkan kolom Brand_code dan Os_code (int16) sesuai encoding hasil fit.
+        Nilai yang tidak dikenal saat fit mendapat kode -1.
+        
+        Args:
+            df: DataFrame dengan kolom Brand dan/atau Os
+            
+        Returns:
+            DataFrame baru dengan kolom kode
+        """
+        if not self.is_fitted:
+            raise ValueError("Preprocessor belum di-fit. Panggil fit() terlebih dahulu.")
+        
+        codes = {}
+        if self._brand_cat is not None and 'Brand' in df.columns:
+            codes['Brand_code'] = df['Brand'].astype(self._brand_cat).cat.codes.astype('int16')
+        if self._os_cat is not None and 'Os' in df.columns:
+            codes['Os_code'] = df['Os'].astype(self._os_cat).cat.codes.astype('int16')
+        
+        return df.assign(**codes)
+    
     def fit_transform(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Fit dan transform dalam satu langkah.
@@ -215,7 +388,10 @@ class DataPreprocessor:
         Returns:
             Transformed DataFrame
         """
-        return self.fit(df).transform(df)
+        # Cleaning cukup sekali untuk fit dan transform
+        df = self._clean(df)
+        self.fit(df, already_cleaned=True)
+        return self._transform_cleaned(df)
     
     def normalize_value(self, value: float, column: str) -> float:
         """
@@ -322,6 +498,33 @@ class DataPreprocessor:
         }
 
 
+@functools.lru_cache(maxsize=512)
+def _parse_camera(resolution: str) -> int:
+    """
+    Parse string resolusi kamera (hasil di-cache per string mentah).
+    
+    Args:
+        resolution: String resolusi, bukan NaN
+        
+    Returns:
+        Nilai numerik dalam MP
+    """
+    resolution = resolution.upper().replace(" ", "")
+    
+    # Cek mapping langsung
+    value = DataPreprocessor.CAMERA_RESOLUTION_MAP.get(resolution)
+    if value is not None:
+        return value
+    
+    # Parse dengan regex
+    match = DataPreprocessor.CAMERA_MP_PATTERN.search(resolution)
+    if match:
+        return int(match.group(1))
+    
+    # Fallback
+    return 12
+
+
 # Singleton instance
 _preprocessor_instance: Optional[DataPreprocessor] = None
 
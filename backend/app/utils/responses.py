@@ -0,0 +1,132 @@
+"""
+Response class JSON berbasis orjson
+Serialisasi datetime dan scalar/array numpy dilakukan langsung oleh orjson.
+"""
+
+import asyncio
+import functools
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from fastapi.routing import APIRoute
+
+
+class CBRJSONResponse(ORJSONResponse):
+    """
+    Default response class API.
+    
+    Handler pada route CBRRoute cukup mengembalikan objek datetime (tanpa
+    isoformat) dan nilai numpy (tanpa .item()); keduanya diserialisasi oleh
+    orjson tanpa melewati jsonable_encoder.
+    """
+    
+    OPTIONS = (
+        orjson.OPT_SERIALIZE_NUMPY
+        | orjson.OPT_OMIT_MICROSECONDS
+        | orjson.OPT_NON_STR_KEYS
+    )
+    
+    def render(self, content: Any) -> bytes:
+        """
+        Serialisasi content ke bytes JSON.
+        
+        Args:
+            content: Data response
+            
+        Returns:
+            Bytes JSON
+        """
+        return orjson.dumps(content, option=self.OPTIONS)
+
+
+def _wrap_endpoint(endpoint: Callable, status_code: int) -> Callable:
+    """
+    Membungkus handler agar hasil non-Response menjadi CBRJSONResponse.
+    
+    Args:
+        endpoint: Handler route (async atau sync)
+        status_code: Status code default route
+    
+    Returns:
+        Handler async dengan signature yang sama (via functools.wraps)
+    """
+    @functools.wraps(endpoint)
+    async def wrapper(**kwargs):
+        if asyncio.iscoroutinefunction(endpoint):
+            result = await endpoint(**kwargs)
+        else:
+            result = await run_in_threadpool(endpoint, **kwargs)
+        
+        if isinstance(result, Response):
+            return result
+        return CBRJSONResponse(result, status_code=status_code)
+    
+    wrapper.cbr_wrapped = True
+    return wrapper
+
+
+class CBRRoute(APIRoute):
+    """
+    Route yang menyerahkan serialisasi hasil handler ke CBRJSONResponse.
+    
+    FastAPI menjalankan jsonable_encoder pada hasil handler sebelum response
+    class dipakai, walaupun response_model None (datetime menjadi isoformat
+    bermikrodetik, numpy ditolak). Handler dibungkus agar dict hasilnya
+    langsung menjadi CBRJSONResponse, sehingga response biasa dan cache hit
+    dihasilkan oleh serializer yang sama.
+    """
+    
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        # include_router membuat ulang route dari endpoint yang sudah dibungkus
+        if not getattr(endpoint, "cbr_wrapped", False):
+            endpoint = _wrap_endpoint(endpoint, kwargs.get("status_code") or 200)
+        super().__init__(path, endpoint, **kwargs)
+
+
+async def _iter_json_list(header: Dict, key: str, rows: List[Dict]) -> AsyncIterator[bytes]:
+    """
+    Menghasilkan object JSON secara bertahap: field header dulu,
+    lalu list `key` satu baris per chunk.
+    
+    Args:
+        header: Field object selain list
+        key: Nama field list (ditulis paling akhir)
+        rows: Isi list
+    
+    Yields:
+        Potongan bytes JSON
+    """
+    options = CBRJSONResponse.OPTIONS
+    
+    # orjson.dumps(header) diakhiri '}' -> buka kembali untuk field list
+    prefix = orjson.dumps(header, option=options)[:-1]
+    yield prefix + (b',"' if header else b'"') + key.encode() + b'":['
+    
+    for i, row in enumerate(rows):
+        yield (b',' if i else b'') + orjson.dumps(row, option=options)
+    
+    yield b']}'
+
+
+def stream_json_list(header: Dict, key: str, rows: List[Dict]) -> StreamingResponse:
+    """
+    Response JSON streaming untuk payload berisi list besar.
+    
+    Byte yang dikirim sama dengan CBRJSONResponse({**header, key: rows}),
+    tetapi baris diserialisasi satu per satu sehingga byte pertama
+    terkirim sebelum seluruh list selesai diserialisasi.
+    
+    Args:
+        header: Field object selain list
+        key: Nama field list (ditulis paling akhir)
+        rows: Isi list
+    
+    Returns:
+        StreamingResponse application/json
+    """
+    return StreamingResponse(
+        _iter_json_list(header, key, rows),
+        media_type="application/json"
+    )
@@ -0,0 +1,56 @@
+"""
+Konversi dataset Excel ke Parquet.
+==================================
+Dijalankan sekali saat deploy. Parquet dibaca DataLoader dengan
+memory-map (pyarrow) sehingga tidak perlu parsing XML Excel, dan
+beberapa proses yang membaca file yang sama berbagi page cache OS.
+
+Penggunaan (dari folder backend):
+    python scripts/convert_xlsx.py [input.xlsx] [output.parquet]
+
+Setelah itu set DATASET_PATH ke file .parquet.
+"""
+
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.utils.data_loader import read_excel, to_arrow_compatible
+
+
+def convert(input_path: Path, output_path: Path) -> Path:
+    """
+    Membaca file Excel dan menulisnya sebagai Parquet.
+    
+    Args:
+        input_path: Path file Excel sumber
+        output_path: Path file Parquet tujuan
+    
+    Returns:
+        Path file Parquet yang ditulis
+    """
+    df = read_excel(input_path)
+    df = to_arrow_compatible(df)
+    df.to_parquet(output_path, index=False)
+    
+    return output_path
+
+
+def main():
+    input_path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(settings.DATASET_PATH)
+    output_path = Path(sys.argv[2]) if len(sys.argv) > 2 else input_path.with_suffix('.parquet')
+    
+    if not input_path.exists():
+        print(f"⚠ File tidak ditemukan: {input_path}")
+        sys.exit(1)
+    
+    convert(input_path, output_path)
+    print(f"[OK] Parquet saved to: {output_path}")
+    print(f"     Set DATASET_PATH={output_path} untuk memakainya.")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,113 @@ Script persiapan dataset - load, label, preprocess, dan split data.
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from typing import Dict, Optional, Tuple
+import argparse
+import hashlib
+import pickle
+import re
 import sys
 import os
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.utils.preprocessing import DataPreprocessor
+from app.utils.data_loader import read_excel, to_arrow_compatible
+from app.utils.preprocessing import get_preprocessor
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - numba opsional
+    NUMBA_AVAILABLE = False
+
+# Pola resolusi kamera: angka sebelum "MP", fallback angka pertama
+_MP_RE = re.compile(r'(\d+)\s*MP', re.IGNORECASE)
+_NUMBER_RE = re.compile(r'(\d+)')
+
+# Naikkan jika logika label/preprocessing berubah agar cache lama tidak dipakai
+PIPELINE_VERSION = 1
+
+# Nama label sesuai kode hasil label_codes
+LABEL_NAMES = np.array(['Daily', 'Gaming', 'Photographer'])
+
+
+if NUMBA_AVAILABLE:
+
+    @njit('i1[:](f8[:], f8[:], f8[:], f8[:], f8[:], f8[:])', cache=True)
+    def label_codes(ram, baterai, harga, rating, storage, kamera_mp):
+        """
+        Hitung kode label per HP dalam satu loop (0=Daily, 1=Gaming, 2=Photographer).
+        
+        Args:
+            ram, baterai, harga, rating, storage, kamera_mp: Nilai numerik per HP
+            
+        Returns:
+            Array kode label (int8)
+        """
+        n = ram.shape[0]
+        out = np.zeros(n, dtype=np.int8)
+        
+        for i in range(n):
+            # Gaming: RAM tinggi + Baterai besar + Storage besar + harga premium
+            gaming_score = 0
+            if ram[i] >= 8:
+                gaming_score += 2
+            if baterai[i] >= 5000:
+                gaming_score += 1
+            if storage[i] >= 256:
+                gaming_score += 1
+            if harga[i] >= 7000000:
+                gaming_score += 1
+            
+            # Gaming didahulukan, Photographer hanya jika bukan Gaming
+            if gaming_score >= 4:
+                out[i] = 1
+                continue
+            
+            # Photographer: Kamera bagus + Rating tinggi + harga mid-premium
+            photo_score = 0
+            if kamera_mp[i] >= 64:
+                photo_score += 2
+            elif kamera_mp[i] >= 48:
+                photo_score += 1
+            if rating[i] >= 4.3:
+                photo_score += 1
+            if harga[i] >= 5000000:
+                photo_score += 1
+            
+            # Daily (0): Everything else (Budget to mid-range)
+            if photo_score >= 3:
+                out[i] = 2
+        
+        return out
+
+else:
+
+    def label_codes(ram, baterai, harga, rating, storage, kamera_mp):
+        """
+        Hitung kode label per HP (0=Daily, 1=Gaming, 2=Photographer).
+        
+        Args:
+            ram, baterai, harga, rating, storage, kamera_mp: Nilai numerik per HP
+            
+        Returns:
+            Array kode label (int8)
+        """
+        gaming_score = (
+            (ram >= 8) * 2
+            + (baterai >= 5000)
+            + (storage >= 256)
+            + (harga >= 7000000)
+        )
+        photo_score = (
+            np.where(kamera_mp >= 64, 2, np.where(kamera_mp >= 48, 1, 0))
+            + (rating >= 4.3)
+            + (harga >= 5000000)
+        )
+        
+        # Gaming didahulukan, Photographer hanya jika bukan Gaming
+        return np.select([gaming_score >= 4, photo_score >= 3], [1, 2], default=0).astype(np.int8)
 
 
 def add_label_column(df: pd.DataFrame) -> pd.DataFrame:
@@ -29,74 +129,37 @@ def add_label_column(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame dengan kolom 'Label' tambahan
     """
-    def parse_camera_mp(resolution):
-        """Parse resolusi kamera ke nilai MP."""
-        if pd.isna(resolution):
-            return 0
-        resolution_str = str(resolution).upper()
-        # Extract MP value
-        import re
-        match = re.search(r'(\d+)\s*MP', resolution_str)
-        if match:
-            return int(match.group(1))
-        # Try to extract just number
-        match = re.search(r'(\d+)', resolution_str)
-        if match:
-            return int(match.group(1))
-        return 0
-    
-    def determine_label(row):
-        """
-        Menentukan label berdasarkan spesifikasi HP.
-        
-        Menggunakan kombinasi harga dan spesifikasi untuk klasifikasi yang lebih akurat:
-        - Gaming: HP dengan spesifikasi tinggi (RAM >= 8, baterai >= 5000) DAN harga premium
-        - Photographer: HP dengan kamera bagus (>= 48MP) DAN rating tinggi
-        - Daily: HP budget hingga mid-range untuk penggunaan sehari-hari
-        """
-        ram = row.get('Ram', 0) or 0
-        baterai = row.get('Kapasitas_baterai', 0) or 0
-        harga = row.get('Harga', 0) or 0
-        rating = row.get('Rating_pengguna', 0) or 0
-        storage = row.get('Memori_internal', 0) or 0
-        
-        # Parse kamera
-        kamera_mp = parse_camera_mp(row.get('Resolusi_kamera', ''))
-        
-        # Gaming: High-end specs focused
-        # RAM tinggi + Baterai besar + Storage besar = Gaming oriented
-        gaming_score = 0
-        if ram >= 8:
-            gaming_score += 2
-        if baterai >= 5000:
-            gaming_score += 1
-        if storage >= 256:
-            gaming_score += 1
-        if harga >= 7000000:  # Premium price
-            gaming_score += 1
-        
-        if gaming_score >= 4:
-            return 'Gaming'
-        
-        # Photographer: Camera focused
-        # Kamera bagus + Rating tinggi = Photography oriented
-        photo_score = 0
-        if kamera_mp >= 64:
-            photo_score += 2
-        elif kamera_mp >= 48:
-            photo_score += 1
-        if rating >= 4.3:
-            photo_score += 1
-        if harga >= 5000000:  # Mid to premium
-            photo_score += 1
-            
-        if photo_score >= 3 and gaming_score < 4:
-            return 'Photographer'
-        
-        # Daily: Everything else (Budget to mid-range)
-        return 'Daily'
+    def column(name: str) -> np.ndarray:
+        """Nilai numerik kolom (NaN / kolom tidak ada = 0)."""
+        if name not in df.columns:
+            return np.zeros(len(df))
+        return df[name].fillna(0).to_numpy(dtype=np.float64)
+    
+    ram = column('Ram')
+    baterai = column('Kapasitas_baterai')
+    harga = column('Harga')
+    rating = column('Rating_pengguna')
+    storage = column('Memori_internal')
+    
+    # Parse kamera ke MP: angka sebelum "MP", fallback angka pertama, kosong = 0
+    # Regex hanya dijalankan pada nilai unik, lalu dipetakan balik per baris
+    if 'Resolusi_kamera' in df.columns:
+        codes, uniques = pd.factorize(df['Resolusi_kamera'])
+        resolution = pd.Series(uniques).astype(str)
+        unique_mp = (
+            resolution.str.extract(_MP_RE, expand=False)
+            .fillna(resolution.str.extract(_NUMBER_RE, expand=False))
+            .fillna(0)
+            .astype(np.int64)
+            .to_numpy()
+        )
+        # Kode -1 = NaN -> 0
+        kamera_mp = np.append(unique_mp, 0)[codes]
+    else:
+        kamera_mp = np.zeros(len(df), dtype=np.int64)
     
-    df['Label'] = df.apply(determine_label, axis=1)
+    codes = label_codes(ram, baterai, harga, rating, storage, kamera_mp.astype(np.float64))
+    df['Label'] = LABEL_NAMES[codes]
     return df
 
 
@@ -110,42 +173,147 @@ def save_raw_data(df: pd.DataFrame, output_path: Path) -> None:
         print(f"    - {label}: {count}")
 
 
-def preprocess_and_save(df: pd.DataFrame, output_path: Path) -> pd.DataFrame:
-    """Preprocess data dan simpan ke CSV."""
-    preprocessor = DataPreprocessor()
+def write_dataset(df: pd.DataFrame, base_path: Path, write_csv: bool = False) -> Path:
+    """
+    Simpan DataFrame ke Parquet (pyarrow, zstd), opsional juga ke CSV.
+    
+    Args:
+        df: DataFrame yang disimpan
+        base_path: Path tujuan tanpa ekstensi
+        write_csv: Tulis juga file .csv di samping file .parquet
+        
+    Returns:
+        Path file Parquet
+    """
+    parquet_path = base_path.with_suffix('.parquet')
+    to_arrow_compatible(df).to_parquet(
+        parquet_path, engine='pyarrow', compression='zstd', index=False
+    )
+    
+    if write_csv:
+        df.to_csv(base_path.with_suffix('.csv'), index=False, encoding='utf-8')
+    
+    return parquet_path
+
+
+def preprocess_data(df: pd.DataFrame) -> pd.DataFrame:
+    """Handle missing values dan tambahkan kolom numerik kamera (input tidak diubah)."""
+    preprocessor = get_preprocessor()
     
-    # Handle missing values dan normalisasi
-    df_clean = preprocessor.handle_missing_values(df.copy())
-    df_clean = preprocessor.add_camera_numeric(df_clean)
+    # Tanpa copy tambahan: hasil fillna sudah DataFrame baru
+    df_clean = preprocessor.handle_missing_values(df)
+    return preprocessor.add_camera_numeric(df_clean, inplace=df_clean is not df)
+
+
+def save_clean_data(df_clean: pd.DataFrame, output_path: Path, write_csv: bool = False) -> None:
+    """Fit preprocessor dan simpan parameternya serta data clean ke Parquet (dan CSV)."""
+    # Singleton: kode lain di proses ini langsung mendapat instance yang sudah fitted
+    preprocessor = get_preprocessor()
+    
+    # Fit untuk normalisasi (df_clean sudah dibersihkan)
+    preprocessor.fit(df_clean, already_cleaned=True)
     
-    # Fit dan transform untuk normalisasi
-    preprocessor.fit(df_clean)
+    # Parameter fit disimpan agar bisa dimuat ulang tanpa fit (DataPreprocessor.load_fitted)
+    params_path = output_path.parent / "preprocessor.pkl"
+    preprocessor.save_fitted(params_path)
+    print(f"[OK] Fitted preprocessor saved to: {params_path}")
     
     # Simpan data clean (tanpa normalisasi untuk readability)
-    df_clean.to_csv(output_path, index=False, encoding='utf-8')
-    print(f"[OK] Clean data saved to: {output_path}")
+    saved_path = write_dataset(df_clean, output_path, write_csv)
+    print(f"[OK] Clean data saved to: {saved_path}")
+
+
+def dataset_cache_key(data_xlsx: Path) -> str:
+    """
+    Key cache dari isi file dataset dan versi pipeline.
     
-    return df_clean
+    Args:
+        data_xlsx: Path file dataset Excel
+        
+    Returns:
+        Hash hex 16 karakter
+    """
+    digest = hashlib.blake2b(data_xlsx.read_bytes())
+    digest.update(f"v{PIPELINE_VERSION}".encode())
+    return digest.hexdigest()[:16]
 
 
-def split_and_save(df: pd.DataFrame, output_dir: Path, train_ratio: float, random_state: int = 42) -> tuple:
-    """Split data dan simpan ke CSV."""
-    from sklearn.model_selection import train_test_split
+def load_cached_pipeline(cache_dir: Path, key: str) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Memuat hasil label + preprocessing dari cache.
     
-    train_df, test_df = train_test_split(
-        df, 
-        train_size=train_ratio, 
-        random_state=random_state,
-        stratify=df['Label']  # Stratified split untuk menjaga distribusi label
-    )
+    Args:
+        cache_dir: Folder cache
+        key: Key dari dataset_cache_key
+        
+    Returns:
+        Tuple (df berlabel, df clean), None jika cache tidak ada
+    """
+    cache_path = cache_dir / f"{key}.pkl"
+    if not cache_path.exists():
+        return None
     
-    scenario_name = f"{int(round(train_ratio * 100))}-{int(round((1 - train_ratio) * 100))}"
+    with open(cache_path, 'rb') as f:
+        return pickle.load(f)
+
+
+def save_cached_pipeline(cache_dir: Path, key: str, df: pd.DataFrame, df_clean: pd.DataFrame) -> None:
+    """
+    Menyimpan hasil label + preprocessing ke cache (entri lama dihapus).
     
-    train_path = output_dir / f"train_{scenario_name}.csv"
-    test_path = output_dir / f"test_{scenario_name}.csv"
+    Args:
+        cache_dir: Folder cache
+        key: Key dari dataset_cache_key
+        df: DataFrame berlabel
+        df_clean: DataFrame hasil preprocessing
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for old in cache_dir.glob("*.pkl"):
+        old.unlink()
     
-    train_df.to_csv(train_path, index=False, encoding='utf-8')
-    test_df.to_csv(test_path, index=False, encoding='utf-8')
+    with open(cache_dir / f"{key}.pkl", 'wb') as f:
+        pickle.dump((df, df_clean), f, protocol=pickle.HIGHEST_PROTOCOL)
+    print(f"[OK] Pipeline cache saved: {key}")
+
+
+def class_permutations(df: pd.DataFrame, random_state: int = 42) -> Dict[str, np.ndarray]:
+    """
+    Acak posisi baris setiap label satu kali, dipakai bersama semua skenario split.
+    
+    Args:
+        df: DataFrame dengan kolom 'Label'
+        random_state: Seed untuk reproducibility
+        
+    Returns:
+        Dictionary label -> posisi baris (iloc) yang sudah diacak
+    """
+    rng = np.random.default_rng(random_state)
+    return {
+        label: rng.permutation(positions)
+        for label, positions in df.groupby('Label', sort=True).indices.items()
+    }
+
+
+def split_and_save(
+    df: pd.DataFrame,
+    output_dir: Path,
+    train_ratio: float,
+    class_perms: Dict[str, np.ndarray],
+    write_csv: bool = False
+) -> tuple:
+    """Split data (stratified per label) dan simpan ke Parquet (dan CSV jika diminta)."""
+    # Stratified split: potong permutasi tiap label pada rasio yang sama
+    cuts = {label: int(round(len(perm) * train_ratio)) for label, perm in class_perms.items()}
+    train_idx = np.sort(np.concatenate([perm[:cuts[label]] for label, perm in class_perms.items()]))
+    test_idx = np.sort(np.concatenate([perm[cuts[label]:] for label, perm in class_perms.items()]))
+    
+    train_df = df.iloc[train_idx]
+    test_df = df.iloc[test_idx]
+    
+    scenario_name = f"{int(round(train_ratio * 100))}-{int(round((1 - train_ratio) * 100))}"
+    
+    train_path = write_dataset(train_df, output_dir / f"train_{scenario_name}", write_csv)
+    test_path = write_dataset(test_df, output_dir / f"test_{scenario_name}", write_csv)
     
     print(f"[OK] Split {scenario_name} saved:")
     print(f"  - Training: {train_path} ({len(train_df)} records)")
@@ -156,6 +324,19 @@ def split_and_save(df: pd.DataFrame, output_dir: Path, train_ratio: float, rando
 
 def main():
     """Main function untuk menjalankan persiapan data."""
+    parser = argparse.ArgumentParser(description="Persiapan dataset CBR")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Abaikan cache dan jalankan ulang label + preprocessing"
+    )
+    parser.add_argument(
+        "--csv",
+        action="store_true",
+        help="Tulis juga data clean dan split sebagai CSV (default hanya Parquet)"
+    )
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("CBR Phone Recommendation - Data Preparation")
     print("=" * 60)
@@ -166,6 +347,7 @@ def main():
     data_xlsx = base_dir / "data.xlsx"
     raw_dir = base_dir / "data" / "raw"
     processed_dir = base_dir / "data" / "processed"
+    cache_dir = processed_dir / "_cache"
     
     # Create directories if not exist
     raw_dir.mkdir(parents=True, exist_ok=True)
@@ -175,17 +357,28 @@ def main():
     print(f"Dataset: {data_xlsx}")
     print()
     
-    # Step 1: Load data
-    print("Step 1: Loading data from Excel...")
-    df = pd.read_excel(data_xlsx)
-    print(f"[OK] Loaded {len(df)} records with {len(df.columns)} columns")
-    print(f"  Columns: {list(df.columns)}")
-    print()
+    # Dataset tidak berubah sejak run terakhir -> pakai hasil label + preprocessing;
+    # cache hanya melewati komputasi, semua file output tetap ditulis
+    cache_key = dataset_cache_key(data_xlsx)
+    cached = None if args.force else load_cached_pipeline(cache_dir, cache_key)
     
-    # Step 2: Add label column
-    print("Step 2: Adding label column (Gaming/Photographer/Daily)...")
-    df = add_label_column(df)
-    print()
+    if cached is not None:
+        df, df_clean = cached
+        print(f"[OK] Dataset unchanged, using pipeline cache: {cache_key}")
+        print(f"  Skipping load, labeling and preprocessing ({len(df)} records)")
+        print()
+    else:
+        # Step 1: Load data
+        print("Step 1: Loading data from Excel...")
+        df = read_excel(data_xlsx)
+        print(f"[OK] Loaded {len(df)} records with {len(df.columns)} columns")
+        print(f"  Columns: {list(df.columns)}")
+        print()
+        
+        # Step 2: Add label column
+        print("Step 2: Adding label column (Gaming/Photographer/Daily)...")
+        df = add_label_column(df)
+        print()
     
     # Step 3: Save raw data
     print("Step 3: Saving raw data with labels...")
@@ -195,29 +388,40 @@ def main():
     
     # Step 4: Preprocess and save clean data
     print("Step 4: Preprocessing data...")
-    clean_path = processed_dir / "hp_dataset_clean.csv"
-    df_clean = preprocess_and_save(df, clean_path)
+    if cached is None:
+        df_clean = preprocess_data(df)
+    clean_path = processed_dir / "hp_dataset_clean"
+    save_clean_data(df_clean, clean_path, write_csv=args.csv)
     print()
     
+    # Acak sekali per label, kedua skenario memotong permutasi yang sama
+    class_perms = class_permutations(df_clean, random_state=42)
+    
     # Step 5: Split data for 70-30 scenario
     print("Step 5: Splitting data (70-30 scenario)...")
-    split_and_save(df_clean, processed_dir, train_ratio=0.7)
+    split_and_save(df_clean, processed_dir, train_ratio=0.7, class_perms=class_perms, write_csv=args.csv)
     print()
     
     # Step 6: Split data for 80-20 scenario
     print("Step 6: Splitting data (80-20 scenario)...")
-    split_and_save(df_clean, processed_dir, train_ratio=0.8)
+    split_and_save(df_clean, processed_dir, train_ratio=0.8, class_perms=class_perms, write_csv=args.csv)
     print()
     
     print("=" * 60)
     print("[SUCCESS] Data preparation completed successfully!")
     print("=" * 60)
     
+    if cached is not None:
+        return
+    
     # Also update the original Excel file with label column
     print()
     print("Bonus: Updating original data.xlsx with Label column...")
     df.to_excel(data_xlsx, index=False)
     print(f"[OK] Updated: {data_xlsx}")
+    
+    # Key dihitung dari file yang baru ditulis agar run berikutnya cache hit
+    save_cached_pipeline(cache_dir, dataset_cache_key(data_xlsx), df, df_clean)
 
 
 if __name__ == "__main__":
@@ -10,52 +10,56 @@ Kriteria Label:
 - Daily: Sisanya (harga dan spec moderat)
 """
 
+import numpy as np
 import pandas as pd
 from pathlib import Path
+import re
 
+# Angka bulat yang bisa di-parse int() setelah "MP" dibuang
+_INT_RE = re.compile(r'[+-]?\d+')
 
-def assign_label(row: pd.Series) -> str:
+
+def assign_labels(df: pd.DataFrame) -> np.ndarray:
     """
-    Assign label berdasarkan karakteristik HP.
+    Assign label seluruh HP sekaligus berdasarkan karakteristiknya.
     
     Args:
-        row: Row dari DataFrame
+        df: DataFrame dataset HP
         
     Returns:
-        Label (Gaming/Photographer/Daily)
+        Array label (Gaming/Photographer/Daily) per baris
     """
-    ram = row.get('Ram', 8)
-    baterai = row.get('Kapasitas_baterai', 4500)
-    kamera = str(row.get('Resolusi_kamera', '12MP'))
-    ukuran_layar = row.get('Ukuran_layar', 6.0)
-    harga = row.get('Harga', 10000000)
-    
-    # Parse kamera
-    kamera_mp = 12
-    if 'MP' in kamera:
-        try:
-            kamera_mp = int(kamera.replace('MP', '').strip())
-        except:
-            kamera_mp = 12
-    
-    # Gaming: High RAM, High Battery, Big Screen
-    if ram >= 12 and baterai >= 5000 and ukuran_layar >= 6.5:
-        return 'Gaming'
-    
-    # Photographer: High Camera Resolution
-    if kamera_mp >= 64:
-        return 'Photographer'
+    def column(name: str, default) -> pd.Series:
+        """Kolom dataset, atau nilai default jika kolom tidak ada."""
+        if name not in df.columns:
+            return pd.Series(default, index=df.index)
+        return df[name]
     
-    # Gaming fallback: High RAM dengan baterai cukup
-    if ram >= 16 and baterai >= 4500:
-        return 'Gaming'
+    ram = column('Ram', 8)
+    baterai = column('Kapasitas_baterai', 4500)
+    kamera = column('Resolusi_kamera', '12MP').astype(str)
+    ukuran_layar = column('Ukuran_layar', 6.0)
     
-    # Photographer fallback: Camera 50MP+ dengan ukuran layar besar
-    if kamera_mp >= 50 and ukuran_layar >= 6.4:
-        return 'Photographer'
+    # Parse kamera: "<angka>MP" -> angka, selain itu 12
+    kamera_num = kamera.str.replace('MP', '', regex=False).str.strip()
+    valid = kamera.str.contains('MP', regex=False) & kamera_num.str.fullmatch(_INT_RE)
+    kamera_mp = pd.to_numeric(kamera_num.where(valid), errors='coerce').fillna(12)
     
-    # Daily: Default
-    return 'Daily'
+    return np.select(
+        [
+            # Gaming: High RAM, High Battery, Big Screen
+            (ram >= 12) & (baterai >= 5000) & (ukuran_layar >= 6.5),
+            # Photographer: High Camera Resolution
+            kamera_mp >= 64,
+            # Gaming fallback: High RAM dengan baterai cukup
+            (ram >= 16) & (baterai >= 4500),
+            # Photographer fallback: Camera 50MP+ dengan ukuran layar besar
+            (kamera_mp >= 50) & (ukuran_layar >= 6.4),
+        ],
+        ['Gaming', 'Photographer', 'Gaming', 'Photographer'],
+        # Daily: Default
+        default='Daily'
+    )
 
 
 def regenerate_labels(input_path: Path, output_path: Path) -> None:
@@ -74,7 +78,7 @@ def regenerate_labels(input_path: Path, output_path: Path) -> None:
     print(df['Label'].value_counts())
     
     # Assign new labels
-    df['Label'] = df.apply(assign_label, axis=1)
+    df['Label'] = assign_labels(df)
     
     print("\nNew label distribution:")
     print(df['Label'].value_counts())
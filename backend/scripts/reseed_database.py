@@ -0,0 +1,52 @@
+"""
+Seed ulang database SQLite dari file dataset.
+=============================================
+phones.db adalah sumber kebenaran case base: HP yang ditambah/dihapus
+admin hanya tersimpan di sana, sehingga aplikasi tidak pernah mengganti
+isinya saat data.xlsx berubah. Jalankan script ini jika isi database
+memang harus diganti dengan isi file dataset (perubahan admin hilang).
+
+Penggunaan (dari folder backend, server dalam keadaan mati):
+    python scripts/reseed_database.py --yes [dataset]
+"""
+
+from pathlib import Path
+import argparse
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.utils.data_loader import DataLoader
+
+
+def main():
+    """Main function untuk seed ulang database."""
+    parser = argparse.ArgumentParser(description="Seed ulang phones.db dari file dataset")
+    parser.add_argument(
+        "dataset",
+        nargs="?",
+        default=settings.DATASET_PATH,
+        help="File dataset sumber (default: DATASET_PATH)"
+    )
+    parser.add_argument(
+        "--yes",
+        action="store_true",
+        help="Konfirmasi: isi database diganti dan perubahan admin hilang"
+    )
+    args = parser.parse_args()
+    
+    if not args.yes:
+        print(f"⚠ Isi {settings.DATABASE_PATH} akan diganti dengan {args.dataset}.")
+        print("  Tambahkan --yes untuk melanjutkan.")
+        sys.exit(1)
+    
+    loader = DataLoader(args.dataset, db_path=settings.DATABASE_PATH)
+    df = loader.load(validate=True, reseed=True)
+    
+    print(f"[OK] Database seeded: {loader.db_path} ({len(df)} records)")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,9 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime
+import os
 import sys
+import threading
 import json
 
 # Add parent directory to path for imports
@@ -21,15 +23,48 @@ from sklearn.metrics import (
     confusion_matrix,
     classification_report
 )
-from collections import Counter
-import matplotlib.pyplot as plt
-import seaborn as sns
+from sklearn.neighbors import KDTree
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from matplotlib.figure import Figure
 
+from app.utils.data_loader import processed_path, read_processed
 from app.utils.preprocessing import DataPreprocessor
 from app.cbr.weighted_euclidean import WeightedEuclideanDistance
+from app.cbr.evaluator import majority_vote
+from app.cbr._kernels import weighted_sqeuclid_q16
 from app.config import settings
 
 
+@lru_cache(maxsize=8)
+def _read_processed_cached(path: str, mtime: float) -> pd.DataFrame:
+    """
+    Baca file processed sekali per (path, mtime).
+    
+    Args:
+        path: Path file (Parquet/CSV)
+        mtime: Waktu modifikasi file (file berubah = entry cache baru)
+        
+    Returns:
+        DataFrame bersama; jangan diubah oleh pemanggil
+    """
+    return read_processed(Path(path))
+
+
+def load_processed(path: Path) -> pd.DataFrame:
+    """
+    Baca file processed dengan cache; file yang sama tidak diparse ulang.
+    
+    Args:
+        path: Path file (Parquet/CSV)
+        
+    Returns:
+        DataFrame (objek yang sama selama file tidak berubah)
+    """
+    path = Path(path)
+    return _read_processed_cached(str(path), path.stat().st_mtime)
+
+
 class LabelBasedEvaluator:
     """
     Evaluator untuk CBR berbasis label klasifikasi.
@@ -37,6 +72,29 @@ class LabelBasedEvaluator:
     Menggunakan majority voting dari Top-K neighbors untuk prediksi label.
     """
     
+    # Mapping: weight_key -> normalized column name
+    FEATURE_MAP = {
+        'Harga': 'Harga_norm',
+        'Ram': 'Ram_norm',
+        'Memori_internal': 'Memori_internal_norm',
+        'Kapasitas_baterai': 'Kapasitas_baterai_norm',
+        'Ukuran_layar': 'Ukuran_layar_norm',
+        'Rating_pengguna': 'Rating_pengguna_norm',
+        'Resolusi_kamera_num': 'Resolusi_kamera_num_norm'
+    }
+    
+    # Margin relatif error pembulatan saat seleksi kandidat tetangga
+    CANDIDATE_TOLERANCE = 1e-9
+    
+    # Skala kuantisasi int16 fitur ternormalisasi (resolusi 1e-4)
+    QUANT_SCALE = 10000
+    
+    # Jumlah case training minimal sebelum seleksi kandidat memakai KDTree
+    KDTREE_MIN_TRAIN = 1000
+    
+    # Batas jumlah pasangan test x train sebelum prediksi dipecah ke thread
+    PARALLEL_MIN_PAIRS = 2_000_000
+    
     def __init__(self, weights: dict = None, k: int = 5):
         """
         Inisialisasi evaluator.
@@ -50,6 +108,26 @@ class LabelBasedEvaluator:
         self.preprocessor = DataPreprocessor()
         self.distance_calculator = WeightedEuclideanDistance(self.weights)
         
+        # Matriks fitur training (dibangun sekali per skenario)
+        self._train_source = None
+        self._train_df = None
+        self.feature_keys = []
+        self.feature_columns = []
+        self.weight_vector = np.empty(0)
+        self.train_X = np.empty((0, 0))
+        self.train_X_q = None
+        self.train_tree = None
+        self.train_tree_norm = 0.0
+        self.train_labels = np.empty(0, dtype=object)
+        
+        # Matriks fitur testing dan bobotnya (kolom yang tidak ada = bobot 0)
+        self.test_X = np.empty((0, 0))
+        self.test_weights = np.empty(0)
+        self.test_labels = np.empty(0, dtype=object)
+        
+        # Buffer kerja seleksi kandidat, terpisah per thread (lihat _buffer)
+        self._buffers = threading.local()
+        
         self.results = {}
     
     def load_and_prepare_data(self, train_path: Path, test_path: Path) -> tuple:
@@ -57,27 +135,99 @@ class LabelBasedEvaluator:
         Load dan prepare training dan testing data.
         
         Args:
-            train_path: Path ke file training CSV
-            test_path: Path ke file testing CSV
+            train_path: Path ke file training (Parquet/CSV)
+            test_path: Path ke file testing (Parquet/CSV)
             
         Returns:
             Tuple (train_df, test_df)
         """
-        train_df = pd.read_csv(train_path)
-        test_df = pd.read_csv(test_path)
-        
-        # Fit preprocessor on training data
-        self.preprocessor.fit(train_df)
+        train_df = load_processed(train_path)
+        test_df = load_processed(test_path)
+        
+        if train_df is self._train_df:
+            # File training sama (cache hit): preprocessor dan matriks training dipakai ulang
+            train_normalized = self._train_source
+        else:
+            # Fit preprocessor on training data (cleaning training cukup sekali);
+            # transform tidak mengubah input, jadi tidak perlu copy
+            train_normalized = self.preprocessor.fit_transform(train_df)
+            
+            # Proyeksi sekali ke matriks fitur, dipakai langsung oleh predict_labels_batch
+            self.prepare_train_features(train_df, train_normalized)
         
-        # Transform both datasets
-        train_normalized = self.preprocessor.transform(train_df.copy())
-        test_normalized = self.preprocessor.transform(test_df.copy())
+        test_normalized = self.preprocessor.transform(test_df)
+        self.test_X, self.test_weights = self.feature_matrix(test_normalized)
+        self.test_labels = test_df['Label'].to_numpy()
         
         return train_df, test_df, train_normalized, test_normalized
     
+    def prepare_train_features(self, train_df: pd.DataFrame, train_normalized: pd.DataFrame) -> None:
+        """
+        Bangun matriks fitur dan label training sekali untuk semua query.
+        
+        Kolom fitur mengikuti extract_features (kolom *_norm, fallback kolom
+        asli) dengan urutan bobot ternormalisasi seperti calculate_distance.
+        
+        Args:
+            train_df: DataFrame training (dengan label asli)
+            train_normalized: DataFrame training yang sudah dinormalisasi
+        """
+        keys = []
+        columns = []
+        for weight_key in self.distance_calculator._normalized_weights:
+            col_name = self.FEATURE_MAP.get(weight_key)
+            if col_name is None:
+                continue
+            if col_name not in train_normalized.columns:
+                # Fallback: try non-normalized column
+                col_name = weight_key.replace('_num', '')
+                if col_name not in train_normalized.columns:
+                    continue
+            keys.append(weight_key)
+            columns.append(col_name)
+        
+        self._train_source = train_normalized
+        self._train_df = train_df
+        self.feature_keys = keys
+        self.feature_columns = columns
+        self.weight_vector = np.array(
+            [self.distance_calculator._normalized_weights[key] for key in keys], dtype=np.float64
+        )
+        self.train_X, _ = self.feature_matrix(train_normalized)
+        self.train_X_q = self.quantize(self.train_X)
+        
+        # KDTree hanya untuk training besar; pada data kecil brute force lebih cepat
+        if len(self.train_X) >= self.KDTREE_MIN_TRAIN:
+            scaled = self.train_X * np.sqrt(self.weight_vector)
+            self.train_tree = KDTree(scaled, leaf_size=40)
+            self.train_tree_norm = np.linalg.norm(scaled, axis=1).max()
+        else:
+            self.train_tree = None
+        self.train_labels = train_df['Label'].to_numpy()
+    
+    def feature_matrix(self, normalized_df: pd.DataFrame) -> tuple:
+        """
+        Proyeksi DataFrame ternormalisasi ke matriks fitur (NaN = 0.0).
+        
+        Args:
+            normalized_df: DataFrame yang sudah dinormalisasi
+            
+        Returns:
+            Tuple (matriks (n_rows, n_features) float64, vektor bobot);
+            kolom fitur yang tidak ada bernilai 0 dengan bobot 0
+        """
+        present = [col in normalized_df.columns for col in self.feature_columns]
+        columns = [col for col, ok in zip(self.feature_columns, present) if ok]
+        
+        X = np.zeros((len(normalized_df), len(self.feature_columns)))
+        X[:, present] = normalized_df[columns].to_numpy(dtype=np.float64, na_value=0.0)
+        
+        return X, np.where(present, self.weight_vector, 0.0)
+    
     def extract_features(self, row: pd.Series) -> dict:
         """
         Extract feature vector dari row untuk distance calculation.
+        Hanya untuk predict_label per query; evaluasi memakai feature_matrix.
         
         Args:
             row: Pandas Series dengan data HP (sudah dinormalisasi)
@@ -85,19 +235,8 @@ class LabelBasedEvaluator:
         Returns:
             Dictionary fitur yang sudah dinormalisasi
         """
-        # Mapping: weight_key -> normalized column name
-        feature_map = {
-            'Harga': 'Harga_norm',
-            'Ram': 'Ram_norm',
-            'Memori_internal': 'Memori_internal_norm',
-            'Kapasitas_baterai': 'Kapasitas_baterai_norm',
-            'Ukuran_layar': 'Ukuran_layar_norm',
-            'Rating_pengguna': 'Rating_pengguna_norm',
-            'Resolusi_kamera_num': 'Resolusi_kamera_num_norm'
-        }
-        
         features = {}
-        for weight_key, col_name in feature_map.items():
+        for weight_key, col_name in self.FEATURE_MAP.items():
             if col_name in row.index:
                 val = row.get(col_name, 0)
                 features[weight_key] = float(val) if pd.notna(val) else 0.0
@@ -123,33 +262,238 @@ class LabelBasedEvaluator:
         Returns:
             Label prediksi (Gaming/Photographer/Daily)
         """
-        similarities = []
+        if self._train_source is not train_normalized:
+            self.prepare_train_features(train_df, train_normalized)
+        
+        # Atribut yang tidak ada di query tidak dihitung (bobot 0)
+        query = np.array([query_features.get(key, 0.0) for key in self.feature_keys])
+        weights = np.where(
+            [key in query_features for key in self.feature_keys], self.weight_vector, 0.0
+        )
+        
+        # Distance ke semua case sekaligus; akumulasi per atribut dengan
+        # urutan yang sama seperti calculate_distance
+        diff = self.train_X - query
+        squared_diff_sum = np.zeros(len(self.train_X))
+        for j in range(len(self.feature_keys)):
+            squared_diff_sum += weights[j] * (diff[:, j] ** 2)
+        similarities = 1 / (1 + np.sqrt(squared_diff_sum))
+        
+        # Get top-k neighbors (similarity descending)
+        top_k = self.top_k_indices(-similarities[None, :])[0]
+        
+        # Majority voting
+        return majority_vote(self.train_labels[top_k][None, :])[0]
+    
+    def top_k_indices(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Indeks K nilai terkecil per baris, terurut naik.
+        
+        Memakai argpartition (O(n)) lalu hanya K elemen yang di-sort.
+        Nilai sama diurutkan berdasarkan indeks, sehingga hasil identik
+        dengan stable argsort penuh (urutan tetangga dipakai saat voting).
+        
+        Args:
+            keys: Matriks (n_query, n_cases); nilai kecil = lebih mirip
+            
+        Returns:
+            Matriks indeks (n_query, min(k, n_cases))
+        """
+        n_cases = keys.shape[1]
+        k = min(self.k, n_cases)
+        if k == n_cases:
+            return np.argsort(keys, axis=1, kind='stable')
+        
+        # Nilai ke-k per baris; semua nilai yang lebih kecil pasti terpilih
+        kth = np.partition(keys, k - 1, axis=1)[:, k - 1:k]
+        strict = keys < kth
+        
+        # Sisa slot diisi nilai yang sama dengan kth, indeks terkecil dulu
+        ties = keys == kth
+        needed = k - strict.sum(axis=1, keepdims=True)
+        selected = strict | (ties & (np.cumsum(ties, axis=1) <= needed))
+        
+        candidates = np.nonzero(selected)[1].reshape(len(keys), k)
+        order = np.argsort(np.take_along_axis(keys, candidates, axis=1), axis=1, kind='stable')
+        return np.take_along_axis(candidates, order, axis=1)
+    
+    def predict_labels_batch(self, test_X: np.ndarray, weights: np.ndarray) -> list:
+        """
+        Prediksi label untuk semua test case sekaligus.
+        
+        Skenario besar (test x train > PARALLEL_MIN_PAIRS) dipecah per blok
+        baris test dan diproses paralel dengan thread; NumPy/BLAS melepas
+        GIL sehingga thread cukup. Hasil sama dengan memanggil predict_label
+        per baris; memakai matriks training dari prepare_train_features.
+        
+        Args:
+            test_X: Matriks fitur testing (dari feature_matrix)
+            weights: Vektor bobot untuk test_X (dari feature_matrix)
+            
+        Returns:
+            List label prediksi, urut sesuai test_X
+        """
+        n_chunks = min(os.cpu_count() or 1, len(test_X))
+        if n_chunks <= 1 or len(test_X) * len(self.train_X) <= self.PARALLEL_MIN_PAIRS:
+            return self._predict_chunk(test_X, weights)
+        
+        chunks = np.array_split(test_X, n_chunks)
+        with ThreadPoolExecutor(max_workers=n_chunks) as executor:
+            results = executor.map(lambda chunk: self._predict_chunk(chunk, weights), chunks)
+            return [label for labels in results for label in labels]
+    
+    def _candidates(self, test_X: np.ndarray, weights: np.ndarray) -> tuple:
+        """
+        Pilih pasangan (test, train) yang mungkin masuk K tetangga terdekat.
+        
+        Training besar memakai KDTree (tanpa matriks test x train penuh);
+        selain itu distance kasar dihitung pada fitur terkuantisasi int16
+        jika nilai muat, atau lewat GEMM (BLAS). Margin seleksi menutup
+        error tiap cara, sehingga K tetangga eksak selalu ada di kandidat.
         
-        for idx, row in train_normalized.iterrows():
-            case_features = self.extract_features(row)
+        Args:
+            test_X: Matriks fitur testing (blok baris)
+            weights: Vektor bobot untuk test_X
             
-            # Calculate similarity
-            similarity = self.distance_calculator.calculate_similarity(
-                query_features, 
-                case_features
-            )
+        Returns:
+            Tuple (indeks baris test, indeks case training) kandidat
+        """
+        if self.train_tree is not None and np.array_equal(weights, self.weight_vector):
+            return self._tree_candidates(test_X)
+        
+        test_q = self.quantize(test_X)
+        if self.train_X_q is not None and test_q is not None:
+            # Error kuantisasi per selisih <= 1/scale, jadi error distance
+            # <= sqrt(total bobot)/scale; kandidat butuh dua kali margin itu
+            approx = weighted_sqeuclid_q16(self.train_X_q, test_q, weights)
+            np.sqrt(approx, out=approx)
+            approx /= self.QUANT_SCALE
+            margin = 2.0 * np.sqrt(weights.sum()) / self.QUANT_SCALE + self.CANDIDATE_TOLERANCE
+        else:
+            # ||a||^2 + ||b||^2 - 2 a.b dengan a, b = fitur * sqrt(bobot);
+            # margin relatif terhadap norma, jauh di atas error pembulatan GEMM
+            sw = np.sqrt(weights)
+            A = test_X * sw
+            B = self.train_X * sw
+            test_sq = np.einsum('ij,ij->i', A, A)[:, None]
+            train_sq = np.einsum('ij,ij->i', B, B)
             
-            # Get original label
-            label = train_df.loc[idx, 'Label']
-            similarities.append((idx, similarity, label))
+            # Matriks distance ditulis ke buffer yang dipakai ulang antar panggilan
+            approx = np.matmul(A, B.T, out=self._buffer('approx', (len(A), len(B))))
+            approx *= -2.0
+            approx += test_sq
+            approx += train_sq
+            margin = self.CANDIDATE_TOLERANCE * (1.0 + test_sq + train_sq.max(initial=0.0))
+        
+        k = min(self.k, approx.shape[1])
+        partitioned = self._buffer('partition', approx.shape)
+        np.copyto(partitioned, approx)
+        partitioned.partition(k - 1, axis=1)
+        
+        mask = self._buffer('mask', approx.shape, dtype=bool)
+        np.less_equal(approx, partitioned[:, k - 1:k] + margin, out=mask)
+        return np.nonzero(mask)
+    
+    def _buffer(self, name: str, shape: tuple, dtype=np.float64) -> np.ndarray:
+        """
+        Buffer kerja per thread yang dipakai ulang antar panggilan.
         
-        # Sort by similarity (descending)
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        Buffer hanya dialokasikan ulang jika ukurannya kurang; thread
+        paralel di predict_labels_batch masing-masing punya buffer sendiri.
+        
+        Args:
+            name: Nama buffer
+            shape: Shape yang dibutuhkan
+            dtype: Tipe data buffer
+            
+        Returns:
+            View buffer dengan shape yang diminta (isi tidak diinisialisasi)
+        """
+        buffers = self._buffers.__dict__
+        size = int(np.prod(shape))
+        buf = buffers.get(name)
+        if buf is None or buf.size < size or buf.dtype != dtype:
+            buf = buffers[name] = np.empty(size, dtype=dtype)
+        return buf[:size].reshape(shape)
+    
+    def _tree_candidates(self, test_X: np.ndarray) -> tuple:
+        """
+        Kandidat tetangga lewat KDTree pada fitur x sqrt(bobot).
         
-        # Get top-k neighbors
-        top_k = similarities[:self.k]
+        Query K tetangga memberi distance ke-K, lalu query radius (distance
+        ke-K + margin pembulatan) mengambil semua case yang mungkin seri.
         
-        # Majority voting
-        labels = [item[2] for item in top_k]
-        label_counts = Counter(labels)
-        predicted_label = label_counts.most_common(1)[0][0]
+        Args:
+            test_X: Matriks fitur testing (blok baris)
+            
+        Returns:
+            Tuple (indeks baris test, indeks case training) kandidat
+        """
+        A = test_X * np.sqrt(self.weight_vector)
+        k = min(self.k, self.train_tree.data.shape[0])
+        kth = self.train_tree.query(A, k=k)[0][:, -1]
         
-        return predicted_label
+        margin = self.CANDIDATE_TOLERANCE * (1.0 + np.linalg.norm(A, axis=1) + self.train_tree_norm)
+        neighbors = self.train_tree.query_radius(A, r=kth + margin)
+        
+        rows = np.repeat(np.arange(len(A)), [len(ind) for ind in neighbors])
+        return rows, np.concatenate(neighbors)
+    
+    def quantize(self, X: np.ndarray):
+        """
+        Kuantisasi matriks fitur ke int16 (nilai x QUANT_SCALE, dibulatkan).
+        
+        Args:
+            X: Matriks fitur float
+            
+        Returns:
+            Matriks int16 C-contiguous, atau None jika ada nilai yang tidak muat
+        """
+        scaled = X * self.QUANT_SCALE
+        info = np.iinfo(np.int16)
+        if not np.isfinite(scaled).all() or np.abs(scaled).max(initial=0.0) > info.max:
+            return None
+        return np.ascontiguousarray(np.rint(scaled), dtype=np.int16)
+    
+    def _predict_chunk(self, test_X: np.ndarray, weights: np.ndarray) -> list:
+        """
+        Prediksi label untuk satu blok baris test.
+        
+        Distance kasar seluruh pasangan test x train dipakai untuk memilih
+        kandidat, lalu distance eksak hanya untuk kandidat tetangga
+        terdekat dan majority voting K tetangga per test case.
+        
+        Args:
+            test_X: Matriks fitur testing (blok baris)
+            weights: Vektor bobot untuk test_X
+            
+        Returns:
+            List label prediksi, urut sesuai test_X
+        """
+        rows, cols = self._candidates(test_X, weights)
+        
+        # Distance eksak hanya untuk kandidat, akumulasi per atribut dengan
+        # urutan yang sama seperti calculate_distance
+        # (operasi in-place pada satu buffer selisih)
+        squared_diff_sum = np.zeros(len(rows))
+        diff = np.empty(len(rows))
+        for j in range(len(self.feature_columns)):
+            np.subtract(self.train_X[cols, j], test_X[rows, j], out=diff)
+            np.square(diff, out=diff)
+            diff *= weights[j]
+            squared_diff_sum += diff
+        
+        keys = -(1 / (1 + np.sqrt(squared_diff_sum)))
+        
+        # Get top-k neighbors (similarity descending): urutkan kandidat per
+        # baris test, seri diurutkan indeks case seperti stable argsort
+        order = np.lexsort((cols, keys, rows))
+        starts = np.searchsorted(rows[order], np.arange(len(test_X)))
+        k = min(self.k, len(self.train_X))
+        top_k = cols[order][starts[:, None] + np.arange(k)]
+        
+        # Majority voting
+        return majority_vote(self.train_labels[top_k]).tolist()
     
     def evaluate_scenario(self, train_path: Path, test_path: Path, 
                           scenario_name: str) -> dict:
@@ -178,26 +522,10 @@ class LabelBasedEvaluator:
         print(f"K neighbors: {self.k}")
         print()
         
-        y_true = []
-        y_pred = []
-        
-        # Evaluate each test case
+        # Evaluate all test cases at once
         total = len(test_df)
-        for i, (idx, row) in enumerate(test_norm.iterrows()):
-            if (i + 1) % 50 == 0 or i == 0:
-                print(f"Progress: {i+1}/{total} ({(i+1)/total*100:.1f}%)")
-            
-            # Extract features from test case
-            query_features = self.extract_features(row)
-            
-            # Predict using majority voting
-            predicted = self.predict_label(query_features, train_df, train_norm)
-            
-            # Get actual label
-            actual = test_df.loc[idx, 'Label']
-            
-            y_true.append(actual)
-            y_pred.append(predicted)
+        y_true = self.test_labels.tolist()
+        y_pred = self.predict_labels_batch(self.test_X, self.test_weights)
         
         print(f"Progress: {total}/{total} (100.0%)")
         print()
@@ -252,67 +580,70 @@ class LabelBasedEvaluator:
         Args:
             output_path: Path ke file output
         """
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write("=" * 70 + "\n")
-            f.write("CBR PHONE RECOMMENDATION - EVALUATION REPORT\n")
-            f.write("=" * 70 + "\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Method: Weighted Euclidean Distance with Majority Voting (K={self.k})\n")
-            f.write("\n")
-            
-            f.write("WEIGHTS USED:\n")
-            f.write("-" * 40 + "\n")
-            for attr, weight in self.weights.items():
-                f.write(f"  {attr}: {weight}%\n")
-            f.write("\n")
+        # Laporan dirakit di memori lalu ditulis sekali
+        parts = []
+        parts.append("=" * 70 + "\n")
+        parts.append("CBR PHONE RECOMMENDATION - EVALUATION REPORT\n")
+        parts.append("=" * 70 + "\n")
+        parts.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        parts.append(f"Method: Weighted Euclidean Distance with Majority Voting (K={self.k})\n")
+        parts.append("\n")
+        
+        parts.append("WEIGHTS USED:\n")
+        parts.append("-" * 40 + "\n")
+        for attr, weight in self.weights.items():
+            parts.append(f"  {attr}: {weight}%\n")
+        parts.append("\n")
+        
+        for scenario_name, result in self.results.items():
+            parts.append("=" * 70 + "\n")
+            parts.append(f"SCENARIO: {scenario_name}\n")
+            parts.append("=" * 70 + "\n")
+            parts.append(f"Training Size: {result['train_size']}\n")
+            parts.append(f"Testing Size: {result['test_size']}\n")
+            parts.append(f"K Neighbors: {result['k_neighbors']}\n")
+            parts.append("\n")
             
-            for scenario_name, result in self.results.items():
-                f.write("=" * 70 + "\n")
-                f.write(f"SCENARIO: {scenario_name}\n")
-                f.write("=" * 70 + "\n")
-                f.write(f"Training Size: {result['train_size']}\n")
-                f.write(f"Testing Size: {result['test_size']}\n")
-                f.write(f"K Neighbors: {result['k_neighbors']}\n")
-                f.write("\n")
-                
-                f.write("EVALUATION METRICS:\n")
-                f.write("-" * 40 + "\n")
-                f.write(f"  Accuracy:  {result['metrics']['accuracy']:.2f}%\n")
-                f.write(f"  Precision: {result['metrics']['precision']:.2f}%\n")
-                f.write(f"  Recall:    {result['metrics']['recall']:.2f}%\n")
-                f.write(f"  F1-Score:  {result['metrics']['f1_score']:.2f}%\n")
-                f.write("\n")
-                
-                f.write("CLASSIFICATION REPORT:\n")
-                f.write("-" * 40 + "\n")
-                f.write(result['classification_report'])
-                f.write("\n")
-                
-                f.write("CONFUSION MATRIX:\n")
-                f.write("-" * 40 + "\n")
-                f.write("              Predicted\n")
-                f.write("              Gaming  Photo   Daily\n")
-                cm = result['confusion_matrix']
-                labels = ['Gaming', 'Photo.', 'Daily']
-                for i, label in enumerate(labels):
-                    row = "  ".join(f"{v:6d}" for v in cm[i])
-                    f.write(f"Actual {label:6s}  {row}\n")
-                f.write("\n")
+            parts.append("EVALUATION METRICS:\n")
+            parts.append("-" * 40 + "\n")
+            parts.append(f"  Accuracy:  {result['metrics']['accuracy']:.2f}%\n")
+            parts.append(f"  Precision: {result['metrics']['precision']:.2f}%\n")
+            parts.append(f"  Recall:    {result['metrics']['recall']:.2f}%\n")
+            parts.append(f"  F1-Score:  {result['metrics']['f1_score']:.2f}%\n")
+            parts.append("\n")
             
-            # Summary comparison
-            f.write("=" * 70 + "\n")
-            f.write("SUMMARY COMPARISON\n")
-            f.write("=" * 70 + "\n")
-            f.write(f"{'Scenario':<12} {'Accuracy':<12} {'Precision':<12} {'Recall':<12} {'F1-Score':<12}\n")
-            f.write("-" * 60 + "\n")
-            for scenario_name, result in self.results.items():
-                m = result['metrics']
-                f.write(f"{scenario_name:<12} {m['accuracy']:<12.2f} {m['precision']:<12.2f} {m['recall']:<12.2f} {m['f1_score']:<12.2f}\n")
+            parts.append("CLASSIFICATION REPORT:\n")
+            parts.append("-" * 40 + "\n")
+            parts.append(result['classification_report'])
+            parts.append("\n")
             
-            # Best scenario
-            best = max(self.results.items(), key=lambda x: x[1]['metrics']['f1_score'])
-            f.write("\n")
-            f.write(f"BEST SCENARIO: {best[0]} (F1-Score: {best[1]['metrics']['f1_score']:.2f}%)\n")
+            parts.append("CONFUSION MATRIX:\n")
+            parts.append("-" * 40 + "\n")
+            parts.append("              Predicted\n")
+            parts.append("              Gaming  Photo   Daily\n")
+            cm = result['confusion_matrix']
+            labels = ['Gaming', 'Photo.', 'Daily']
+            for i, label in enumerate(labels):
+                row = "  ".join(f"{v:6d}" for v in cm[i])
+                parts.append(f"Actual {label:6s}  {row}\n")
+            parts.append("\n")
+        
+        # Summary comparison
+        parts.append("=" * 70 + "\n")
+        parts.append("SUMMARY COMPARISON\n")
+        parts.append("=" * 70 + "\n")
+        parts.append(f"{'Scenario':<12} {'Accuracy':<12} {'Precision':<12} {'Recall':<12} {'F1-Score':<12}\n")
+        parts.append("-" * 60 + "\n")
+        for scenario_name, result in self.results.items():
+            m = result['metrics']
+            parts.append(f"{scenario_name:<12} {m['accuracy']:<12.2f} {m['precision']:<12.2f} {m['recall']:<12.2f} {m['f1_score']:<12.2f}\n")
+        
+        # Best scenario
+        best = max(self.results.items(), key=lambda x: x[1]['metrics']['f1_score'])
+        parts.append("\n")
+        parts.append(f"BEST SCENARIO: {best[0]} (F1-Score: {best[1]['metrics']['f1_score']:.2f}%)\n")
+        
+        Path(output_path).write_text("".join(parts), encoding='utf-8')
         
         print(f"\n[OK] Metrics report saved to: {output_path}")
     
@@ -324,34 +655,40 @@ class LabelBasedEvaluator:
             output_path: Path ke file output
         """
         n_scenarios = len(self.results)
-        fig, axes = plt.subplots(1, n_scenarios, figsize=(6 * n_scenarios, 5))
         
-        if n_scenarios == 1:
-            axes = [axes]
+        # Figure langsung (tanpa pyplot): tidak ada inisialisasi backend GUI
+        # maupun state figure global; PNG dirender lewat Agg
+        fig = Figure(figsize=(6 * n_scenarios, 5))
+        axes = fig.subplots(1, n_scenarios, squeeze=False)[0]
         
         for ax, (scenario_name, result) in zip(axes, self.results.items()):
             cm = np.array(result['confusion_matrix'])
             labels = result['labels']
             
             # Create heatmap
-            sns.heatmap(
-                cm, 
-                annot=True, 
-                fmt='d', 
-                cmap='Blues',
-                xticklabels=labels,
-                yticklabels=labels,
-                ax=ax
-            )
+            image = ax.imshow(cm, cmap='Blues')
+            fig.colorbar(image, ax=ax)
+            
+            ticks = np.arange(len(labels))
+            ax.set_xticks(ticks, labels)
+            ax.set_yticks(ticks, labels)
+            
+            # Anotasi jumlah; teks putih di sel gelap
+            threshold = cm.max(initial=0) / 2
+            for i, j in np.ndindex(cm.shape):
+                ax.text(
+                    j, i, str(cm[i, j]),
+                    ha='center', va='center',
+                    color='white' if cm[i, j] > threshold else 'black'
+                )
             
             ax.set_title(f'Confusion Matrix - Scenario {scenario_name}\n'
                         f'Accuracy: {result["metrics"]["accuracy"]:.1f}%')
             ax.set_xlabel('Predicted Label')
             ax.set_ylabel('Actual Label')
         
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(output_path, dpi=150, bbox_inches='tight')
         
         print(f"[OK] Confusion matrix plot saved to: {output_path}")
     
@@ -365,8 +702,9 @@ class LabelBasedEvaluator:
                 if k not in ['y_true', 'y_pred']
             }
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(export_results, f, indent=2, ensure_ascii=False)
+        Path(output_path).write_text(
+            json.dumps(export_results, indent=2, ensure_ascii=False), encoding='utf-8'
+        )
         
         print(f"[OK] Results JSON saved to: {output_path}")
 
@@ -393,8 +731,8 @@ def main():
     print()
     
     # Evaluate 70-30 scenario
-    train_70 = processed_dir / "train_70-30.csv"
-    test_70 = processed_dir / "test_70-30.csv"
+    train_70 = processed_path(processed_dir, "train_70-30")
+    test_70 = processed_path(processed_dir, "test_70-30")
     
     if train_70.exists() and test_70.exists():
         evaluator.evaluate_scenario(train_70, test_70, "70-30")
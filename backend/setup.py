@@ -0,0 +1,32 @@
+"""
+Build script untuk meng-compile modul CBR dengan Cython.
+
+Penggunaan (dari folder backend):
+    python setup.py build_ext --inplace
+
+Menghasilkan file .so di samping source .py; Python otomatis memakai
+versi compiled jika ada. Tanpa build ini aplikasi tetap berjalan normal.
+"""
+
+from setuptools import setup
+from Cython.Build import cythonize
+
+# Modul yang dipanggil di setiap request / evaluasi.
+# _kernels.py tidak ikut karena sudah di-JIT oleh Numba.
+CYTHON_MODULES = [
+    "app/cbr/cbr_engine.py",
+    "app/cbr/evaluator.py",
+    "app/utils/data_loader.py",
+]
+
+setup(
+    name="cbr-backend-compiled",
+    ext_modules=cythonize(
+        CYTHON_MODULES,
+        compiler_directives={
+            "language_level": 3,
+            # Anotasi tipe tetap sebagai hint, bukan tipe C yang dipaksakan
+            "annotation_typing": False,
+        },
+    ),
+)
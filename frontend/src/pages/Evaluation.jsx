@@ -123,7 +123,14 @@ export default function Evaluation() {
                 similarity_threshold: 0.5
             };
 
-            const data = await evaluationAPI.runEvaluation(config);
+            const job = await evaluationAPI.runEvaluation(config);
+
+            // Poll job sampai evaluasi selesai
+            let data = job;
+            while (data.status === 'running') {
+                await new Promise((resolve) => setTimeout(resolve, 2000));
+                data = await evaluationAPI.getJobResult(job.job_id);
+            }
             setResults(data);
             toast.success('Evaluasi selesai!', { id: 'evaluation' });
 
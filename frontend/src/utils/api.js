@@ -102,11 +102,17 @@ export const recommendationAPI = {
 // ==================== Evaluation API ====================
 export const evaluationAPI = {
     /**
-     * Run evaluation with specified scenarios
+     * Run evaluation with specified scenarios (returns a job id)
      */
     runEvaluation: (config = {}) =>
         api.post('/evaluation/run', config),
 
+    /**
+     * Get status/result of a background evaluation job
+     */
+    getJobResult: (jobId) =>
+        api.get(`/evaluation/results/${jobId}`),
+
     /**
      * Get previous evaluation results
      */
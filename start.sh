@@ -1,2 +1,2 @@
 #!/bin/bash
-python -m uvicorn app.main:app --host 0.0.0.0 --port $PORT
\ No newline at end of file
+python -m uvicorn app.main:app --host 0.0.0.0 --port $PORT --loop uvloop --http httptools
\ No newline at end of file